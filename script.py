@@ -1,4 +1,5 @@
 import time,socket,platform,subprocess, glob
+from stat_reporter import REGISTRY, shared_gpu_probe
 
 
 heure=time.strftime(("%H:%M:%S"))
@@ -40,17 +41,12 @@ def get_temperatures():
     return temperatures
 temp_composants = get_temperatures()
 
+sonde_gpu = shared_gpu_probe()
 def get_gpu_temperature():
-    try:
-        result = subprocess.run(
-            ["nvidia-smi", "--query-gpu=temperature.gpu", "--format=csv,noheader,nounits"],
-            capture_output=True, text=True, check=True, encoding='utf-8'
-        )
-        return f"{int(result.stdout.strip())}°C"
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    gpu_temps = sonde_gpu.temperatures()
+    if not gpu_temps:
         return None
-    except Exception as e:
-        return f"Erreur GPU: {e}"
+    return f"{next(iter(gpu_temps.values()))}°C"
 gpu_temp = get_gpu_temperature()
 if gpu_temp:
     temp_composants["GPU_NVIDIA"] = gpu_temp
@@ -115,3 +111,11 @@ dl_info=[open("/sys/class/net/wlp8s0/statistics/rx_bytes").read(),open("/sys/cla
 dl1=dl_info[0].strip(),dl_info[1].strip()
 telechargement=str(int(int(dl1[0])/1000024)) + ("Mo")
 envoi=int(dl1[1])/1024
+
+
+# Collecteurs de ce script dans le registre partagé de stat_reporter, préfixés
+# pour ne pas entrer en collision avec ceux des autres scripts
+COLLECTEURS_SCRIPT = ("script.temperatures", "script.gpu", "script.wifi")
+REGISTRY.register('hardware', "script.temperatures", get_temperatures, cost=2)
+REGISTRY.register('hardware', "script.gpu", get_gpu_temperature, cost=1)
+REGISTRY.register('network', "script.wifi", get_wifi_info, cost=2)
@@ -0,0 +1,237 @@
+# stat_alerts.py
+
+"""Moteur d'alertes à seuils, évalué à chaque échantillon.
+
+Une règle par ligne :
+
+    <métrique> <op> <seuil> [pendant <durée>s] [retour <seuil>]
+
+    memory.used_percent > 90 pendant 30s retour 85
+    temps.* > 85 pendant 10s retour 80
+    services.*.open < 1 pendant 10s
+
+La métrique accepte les jokers (`*`) sur les noms de `snapshot_metrics`.
+Une alerte se déclenche quand le seuil est franchi sans interruption
+pendant la durée indiquée, et ne se résout qu'une fois la valeur revenue
+de l'autre côté du seuil de retour (hystérésis : pas de battement autour
+du seuil). Les règles sont compilées une fois ; chaque nouvelle métrique
+est associée une fois pour toutes aux règles qui la visent, puis chaque
+échantillon ne coûte qu'un passage sur les métriques présentes.
+"""
+
+import fnmatch
+import math
+import operator
+import os
+import re
+import sys
+import time
+
+from stat_reporter import PROFILER, snapshot_metrics
+
+DEFAULT_RULES = """
+# Mémoire et swap
+memory.used_percent > 90 pendant 30s retour 85
+memory.swap_used_percent > 50 pendant 60s retour 40
+# Capteurs (CPU, GPU, chipset...)
+temps.* > 85 pendant 10s retour 80
+# Systèmes de fichiers
+disks.*.used_percent > 90 retour 88
+# Batterie
+power.capacity < 15 retour 20
+# Services surveillés (--ports)
+services.*.open < 1 pendant 10s
+"""
+
+_OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+# Condition de retour : l'inverse strict de l'opérateur, appliqué au seuil de retour
+_CLEAR_OPERATORS = {">": operator.le, ">=": operator.lt, "<": operator.ge, "<=": operator.gt}
+_RULE = re.compile(r'^(\S+)\s*(>=|<=|>|<)\s*(-?\d+(?:\.\d+)?)'
+                   r'(?:\s+pendant\s+(\d+(?:\.\d+)?)s?)?(?:\s+retour\s+(-?\d+(?:\.\d+)?))?\s*$')
+
+STATE_OK, STATE_PENDING, STATE_FIRING = 0, 1, 2
+
+
+class AlertRule:
+    __slots__ = ("text", "pattern", "op", "threshold", "clear_threshold", "duration", "breach", "clear", "_match")
+
+    def __init__(self, text, pattern, op, threshold, duration=0.0, clear_threshold=None):
+        self.text = text
+        self.pattern = pattern
+        self.op = op
+        self.threshold = threshold
+        self.duration = duration
+        self.clear_threshold = threshold if clear_threshold is None else clear_threshold
+        self.breach = _OPERATORS[op]
+        self.clear = _CLEAR_OPERATORS[op]
+        self._match = re.compile(fnmatch.translate(pattern)).match if "*" in pattern else None
+
+    def matches(self, name):
+        return self._match(name) is not None if self._match is not None else name == self.pattern
+
+
+def parse_rules(text):
+    """Compile le texte des règles ; lève ValueError avec le numéro de ligne fautive."""
+    rules = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        match = _RULE.match(line)
+        if match is None:
+            raise ValueError(f"règle invalide ligne {number} : {line!r}")
+        pattern, op, threshold, duration, clear = match.groups()
+        threshold = float(threshold)
+        clear = float(clear) if clear is not None else None
+        if clear is not None and _OPERATORS[op](clear, threshold):
+            raise ValueError(f"ligne {number} : le seuil de retour doit être du côté sain du seuil")
+        rules.append(AlertRule(line, pattern, op, threshold, float(duration or 0), clear))
+    return rules
+
+
+class _Track:
+    """État d'une règle pour une métrique donnée."""
+    __slots__ = ("rule", "name", "state", "since")
+
+    def __init__(self, rule, name):
+        self.rule = rule
+        self.name = name
+        self.state = STATE_OK
+        self.since = 0.0
+
+
+class AlertSink:
+    """Destination des événements : journal (fichier ou sortie standard) et commande crochet.
+
+    La commande reçoit l'événement dans ses variables d'environnement
+    (ALERTE_ETAT, ALERTE_REGLE, ALERTE_METRIQUE, ALERTE_VALEUR) et n'est pas
+    attendue : un crochet lent ne retarde pas l'échantillonnage.
+    """
+
+    def __init__(self, log_path="-", hook=None):
+        self.log_path = log_path
+        self.hook = hook
+        self._hooks = []
+
+    def emit(self, state, rule, name, value, timestamp):
+        line = (f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))} {state} "
+                f"{name}={value:g} ({rule.text})\n")
+        if self.log_path == "-":
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        else:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"Erreur d'écriture du journal d'alertes ({self.log_path}): {e}")
+        if self.hook:
+            self._run_hook(state, rule, name, value)
+
+    def _run_hook(self, state, rule, name, value):
+        import subprocess
+        # Récupère les crochets terminés pour ne pas accumuler de zombies
+        self._hooks = [p for p in self._hooks if p.poll() is None]
+        env = dict(os.environ, ALERTE_ETAT=state, ALERTE_REGLE=rule.text, ALERTE_METRIQUE=name,
+                   ALERTE_VALEUR=f"{value:g}")
+        PROFILER.count_subprocess()
+        try:
+            self._hooks.append(subprocess.Popen(self.hook, shell=True, env=env, stdin=subprocess.DEVNULL))
+        except OSError as e:
+            print(f"Erreur du crochet d'alerte ({self.hook}): {e}")
+
+
+class AlertEngine:
+    """Évalue les règles compilées sur chaque échantillon, de façon incrémentale.
+
+    `observe(metrics, now)` ne regarde que les valeurs de l'échantillon
+    courant et l'état mémorisé de chaque couple (règle, métrique) : aucun
+    historique n'est relu. Une métrique NaN laisse l'état inchangé ; une
+    métrique absente de l'échantillon (interface, disque ou cgroup disparu)
+    est oubliée, et ses alertes en cours sont résolues. Seules les métriques
+    visées par au moins une règle sont suivies.
+    """
+
+    FIRING = "DÉCLENCHÉE"
+    RESOLVED = "RÉSOLUE"
+
+    def __init__(self, rules, sink=None):
+        self.rules = rules
+        self.sink = sink
+        self.events = 0
+        self._tracks = {}
+        # Métriques de l'échantillon courant qu'aucune règle ne vise (évite de refaire la correspondance)
+        self._ignored = set()
+
+    def _tracks_for(self, name):
+        tracks = [_Track(rule, name) for rule in self.rules if rule.matches(name)]
+        if tracks:
+            self._tracks[name] = tracks
+        else:
+            self._ignored.add(name)
+        return tracks
+
+    def observe(self, metrics, now=None, timestamp=None):
+        """Applique un échantillon `{métrique: valeur}` ; renvoie la liste des événements émis."""
+        now = time.monotonic() if now is None else now
+        events = []
+        tracks_by_name = self._tracks
+        ignored = self._ignored
+        for name, value in metrics.items():
+            tracks = tracks_by_name.get(name)
+            if tracks is None:
+                if name in ignored:
+                    continue
+                tracks = self._tracks_for(name)
+            if not tracks or value != value:  # NaN : valeur inconnue
+                continue
+            for track in tracks:
+                rule = track.rule
+                if track.state == STATE_FIRING:
+                    if rule.clear(value, rule.clear_threshold):
+                        track.state = STATE_OK
+                        events.append((self.RESOLVED, rule, name, value))
+                elif rule.breach(value, rule.threshold):
+                    if track.state == STATE_OK:
+                        track.state = STATE_PENDING
+                        track.since = now
+                    if now - track.since >= rule.duration:
+                        track.state = STATE_FIRING
+                        events.append((self.FIRING, rule, name, value))
+                else:
+                    track.state = STATE_OK
+
+        # Métriques disparues : leurs alertes en cours sont résolues, leur état oublié
+        for name in tracks_by_name.keys() - metrics.keys():
+            for track in tracks_by_name.pop(name):
+                if track.state == STATE_FIRING:
+                    events.append((self.RESOLVED, track.rule, name, math.nan))
+        if len(ignored) > len(metrics) - len(tracks_by_name):
+            ignored.intersection_update(metrics)
+
+        if events:
+            self.events += len(events)
+            if self.sink is not None:
+                timestamp = time.time() if timestamp is None else timestamp
+                for state, rule, name, value in events:
+                    self.sink.emit(state, rule, name, value, timestamp)
+        return events
+
+    def on_sample(self, snapshot, incomplete=None):
+        """Rappel compatible avec CollectorDaemon(on_sample=...)."""
+        return self.observe(snapshot_metrics(snapshot))
+
+    def active(self):
+        """Couples (métrique, règle) actuellement en alerte."""
+        return [(track.name, track.rule.text) for tracks in self._tracks.values()
+                for track in tracks if track.state == STATE_FIRING]
+
+
+def load_engine(rules_path=None, log_path="-", hook=None):
+    """Construit le moteur à partir d'un fichier de règles (règles par défaut sinon)."""
+    if rules_path is None:
+        text = DEFAULT_RULES
+    else:
+        with open(rules_path, "r", encoding="utf-8") as f:
+            text = f.read()
+    return AlertEngine(parse_rules(text), AlertSink(log_path, hook))
@@ -0,0 +1,191 @@
+# stat_bench.py
+
+"""Banc d'essai des collecteurs et du rendu HTML sur un /proc et un /sys factices.
+
+Construit une arborescence synthétique (processus, montages, zones
+thermiques, interfaces, disques, cgroups) dans un dossier temporaire, puis mesure
+chaque méthode de SystemCollector et le rendu du rapport : latences p50/p99
+et pic mémoire (tracemalloc).
+
+    python stat_bench.py --scale large --iterations 30
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from stat_reporter import REPORT_SECTIONS, SystemCollector, collect_report_data, render_html_report
+
+SCALES = {
+    "small": {"processes": 500, "mounts": 20, "thermal_zones": 4, "interfaces": 4, "disks": 2, "cpus": 4, "cgroups": 16},
+    "medium": {"processes": 5000, "mounts": 100, "thermal_zones": 16, "interfaces": 20, "disks": 8, "cpus": 16, "cgroups": 200},
+    "large": {"processes": 50000, "mounts": 500, "thermal_zones": 64, "interfaces": 100, "disks": 32, "cpus": 64, "cgroups": 2000},
+}
+
+ALL_SECTIONS = list(REPORT_SECTIONS)
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def build_fake_tree(root, processes, mounts, thermal_zones, interfaces, disks, cpus, cgroups):
+    """Crée `root/proc` et `root/sys` ; renvoie (proc_root, sys_root)."""
+    proc = os.path.join(root, "proc")
+    sys_root = os.path.join(root, "sys")
+
+    _write(f"{proc}/uptime", "86400.00 172800.00\n")
+    _write(f"{proc}/meminfo", "MemTotal:       65536000 kB\nMemFree:        1000000 kB\n"
+                              "MemAvailable:   32768000 kB\nBuffers:          200000 kB\n"
+                              "Cached:         8000000 kB\nSwapTotal:      8388608 kB\nSwapFree:       8000000 kB\n")
+
+    cpu_lines = ["cpu  %d 0 %d %d 0 0 0 0 0 0" % (cpus * 1000, cpus * 500, cpus * 10000)]
+    cpu_lines += ["cpu%d 1000 0 500 10000 0 0 0 0 0 0" % i for i in range(cpus)]
+    _write(f"{proc}/stat", "\n".join(cpu_lines) + "\nintr 0\n")
+
+    for pid in range(1, processes + 1):
+        # Champs 1 à 24 de /proc/<pid>/stat : utime=14, stime=15, starttime=22, rss=24
+        fields = ["S"] + ["0"] * 10 + [str(pid % 997), str(pid % 89)] + ["0"] * 6 + [str(pid * 7)] + ["0", str(pid % 5000)]
+        _write(f"{proc}/{pid}/stat", f"{pid} (proc {pid}) {' '.join(fields)}\n")
+        _write(f"{proc}/{pid}/smaps_rollup", f"Rss: {pid % 5000 * 4} kB\nPss: {pid % 5000 * 2} kB\n"
+                                             f"Private_Clean: 0 kB\nPrivate_Dirty: {pid % 5000} kB\nSwap: {pid % 7} kB\n")
+        _write(f"{proc}/{pid}/cgroup", f"0::/bench.slice/svc{pid % cgroups}.service\n")
+
+    dev_lines = ["Inter-|   Receive                                                |  Transmit",
+                 " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed"]
+    for i in range(interfaces):
+        name = f"bench{i}"
+        dev_lines.append(f"{name:>6}: {i * 1000} {i * 10} 0 0 0 0 0 0 {i * 2000} {i * 20} 0 0 0 0 0 0")
+        _write(f"{sys_root}/class/net/{name}/flags", "0x1003\n")
+    _write(f"{proc}/net/dev", "\n".join(dev_lines) + "\n")
+
+    disk_lines = []
+    for i in range(disks):
+        name = f"sd{chr(ord('a') + i % 26)}{'' if i < 26 else i // 26}"
+        disk_lines.append(f"   8 {i * 16} {name} 100 0 800 50 200 0 1600 80 0 120 130 0 0 0 0 0 0")
+        disk_lines.append(f"   8 {i * 16 + 1} {name}1 10 0 80 5 20 0 160 8 0 12 13 0 0 0 0 0 0")
+        _write(f"{sys_root}/block/{name}/size", "1953525168\n")
+        _write(f"{sys_root}/block/{name}/queue/rotational", "0\n")
+        _write(f"{sys_root}/block/{name}/device/model", f"FAKE-SSD-{i}\n")
+    _write(f"{proc}/diskstats", "\n".join(disk_lines) + "\n")
+
+    mount_lines = []
+    for i in range(mounts):
+        target = os.path.join(root, "mnt", f"vol{i}")
+        os.makedirs(target, exist_ok=True)
+        mount_lines.append(f"{100 + i} 1 252:{i} / {target} rw,relatime shared:1 - ext4 /dev/mapper/vol{i} rw")
+    mount_lines.append(f"{100 + mounts} 1 0:5 / /dev rw - devtmpfs udev rw")
+    _write(f"{proc}/self/mountinfo", "\n".join(mount_lines) + "\n")
+    _write(f"{proc}/self/mounts", "")
+
+    for i in range(thermal_zones):
+        _write(f"{sys_root}/class/thermal/thermal_zone{i}/type", f"zone{i}\n")
+        _write(f"{sys_root}/class/thermal/thermal_zone{i}/temp", f"{40000 + i * 100}\n")
+
+    # Hiérarchie cgroup v2 unifiée : une tranche, un service par cgroup
+    cgroup_root = f"{sys_root}/fs/cgroup"
+    _write(f"{cgroup_root}/cgroup.controllers", "cpu io memory pids\n")
+    _write(f"{cgroup_root}/cgroup.stat", f"nr_descendants {cgroups + 1}\nnr_dying_descendants 0\n")
+    _write(f"{cgroup_root}/cpu.stat", "usage_usec 0\n")
+    for i in range(cgroups + 1):
+        group = f"{cgroup_root}/bench.slice" if i == cgroups else f"{cgroup_root}/bench.slice/svc{i}.service"
+        _write(f"{group}/memory.current", f"{(i + 1) * 1048576}\n")
+        _write(f"{group}/memory.max", "max\n" if i % 2 else f"{(i + 2) * 1048576}\n")
+        _write(f"{group}/cpu.stat", f"usage_usec {i * 1000}\nuser_usec 0\nsystem_usec 0\n")
+        _write(f"{group}/io.stat", f"8:0 rbytes={i * 4096} wbytes={i * 512} rios={i} wios={i} dbytes=0 dios=0\n")
+
+    _write(f"{sys_root}/class/power_supply/BAT0/status", "Discharging\n")
+    _write(f"{sys_root}/class/power_supply/BAT0/capacity", "76\n")
+    os.makedirs(f"{sys_root}/class/hwmon", exist_ok=True)
+    return proc, sys_root
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, iterations):
+    """Renvoie (p50_ms, p99_ms, pic_mémoire_Ko) pour `func`."""
+    func()  # échauffement : inventaire, descripteurs ouverts, caches
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Mesure mémoire séparée : tracemalloc fausserait les temps
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), _percentile(timings, 99), peak / 1024
+
+
+def run_benchmark(scale="small", iterations=20, keep=False):
+    sizes = SCALES[scale]
+    root = tempfile.mkdtemp(prefix="stat_bench_")
+    try:
+        start = time.perf_counter()
+        proc_root, sys_root = build_fake_tree(root, **sizes)
+        print(f"Arborescence '{scale}' créée en {time.perf_counter() - start:.1f}s dans {root} : "
+              + ", ".join(f"{k}={v}" for k, v in sizes.items()))
+
+        # Aucune sonde de ports réelle pendant le banc d'essai
+        collector = SystemCollector(proc_root=proc_root, sys_root=sys_root, service_targets=())
+        data, _ = collect_report_data(collector)
+        pss_collector = SystemCollector(proc_root=proc_root, sys_root=sys_root, memory_accounting="pss")
+
+        cases = [
+            ("get_general_info", collector.get_general_info),
+            ("get_memory_stats", collector.get_memory_stats),
+            ("get_cpu_usage", collector.get_cpu_usage),
+            ("get_temperatures", collector.get_temperatures),
+            ("get_power_supply", collector.get_power_supply),
+            ("get_process_list", collector.get_process_list),
+            ("get_process_list pss", pss_collector.get_process_list),
+            ("get_disk_usage", collector.get_disk_usage),
+            ("get_disk_io", collector.get_disk_io),
+            ("get_network_info", collector.get_network_info),
+            ("get_cgroups", collector.get_cgroups),
+            ("render_html_report", lambda: render_html_report(data, ALL_SECTIONS)),
+            ("collecte + rendu", lambda: render_html_report(collect_report_data(collector)[0], ALL_SECTIONS)),
+        ]
+
+        print(f"\n{'Étape':<22} {'p50 (ms)':>10} {'p99 (ms)':>10} {'pic mém. (Ko)':>14}")
+        print("-" * 60)
+        results = {}
+        for name, func in cases:
+            p50, p99, peak = measure(func, iterations)
+            results[name] = (p50, p99, peak)
+            print(f"{name:<22} {p50:>10.2f} {p99:>10.2f} {peak:>14.1f}")
+        return results
+    finally:
+        if keep:
+            print(f"\nArborescence conservée : {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des collecteurs sur un /proc et /sys factices.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small",
+                        help="Taille de l'arborescence synthétique. (Défaut: small)")
+    parser.add_argument("--iterations", type=int, default=20, help="Nombre de mesures par étape. (Défaut: 20)")
+    parser.add_argument("--keep", action="store_true", help="Conserve l'arborescence générée après le test.")
+    args = parser.parse_args()
+
+    if args.iterations <= 0:
+        parser.error("--iterations doit être strictement positif.")
+    run_benchmark(args.scale, args.iterations, args.keep)
+
+
+if __name__ == "__main__":
+    main()
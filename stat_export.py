@@ -0,0 +1,213 @@
+# stat_export.py
+
+"""Export continu des métriques en JSON Lines ou CSV.
+
+Chaque échantillon devient un enregistrement compact d'une ligne, écrit sur
+la sortie standard ou dans un fichier. La collecte est un pipeline de
+générateurs (échantillons -> enregistrements -> lignes -> écrivain) : rien
+n'est conservé d'un échantillon à l'autre, une capture de plusieurs jours
+garde une empreinte mémoire constante.
+
+    python stat_reporter.py --export jsonl --interval 1 --export-file mesures.jsonl
+"""
+
+import csv
+import io
+import json
+import math
+import os
+import sys
+import time
+
+from stat_reporter import REGISTRY, SystemCollector, snapshot_metrics
+
+EXPORT_FORMATS = ("jsonl", "csv")
+EXPORT_BUFFER_SIZE = 64 * 1024
+EXPORT_FLUSH_INTERVAL = 5.0
+EXPORT_MAX_BYTES = 64 * 1024 * 1024
+EXPORT_BACKUPS = 5
+EXPORT_PRECISION = 3
+# Seuls les collecteurs qui produisent des métriques numériques : pas de
+# table des processus ni de sonde de ports à chaque seconde
+EXPORT_COLLECTORS = ("memory", "cpu", "temps", "power", "disk_io", "network")
+
+
+def sample_stream(collector=None, interval=1.0, count=None):
+    """Génère `(horodatage, instantané)` à cadence fixe, sans dérive.
+
+    Le premier échantillon arrive après un intervalle d'amorçage. S'arrête
+    après `count` échantillons (infini si None). Un tour trop long
+    n'entraîne pas de rattrapage en rafale : la cadence repart de l'instant
+    présent.
+    """
+    collector = collector or SystemCollector()
+    # Tour d'amorçage non exporté : les débits et l'usage CPU ont besoin
+    # d'un point de départ, sinon le premier enregistrement serait incomplet
+    # (et l'en-tête CSV changerait dès le deuxième)
+    REGISTRY.collect(None, collector, names=EXPORT_COLLECTORS)
+    next_tick = time.monotonic() + interval
+    time.sleep(interval)
+    produced = 0
+    while count is None or produced < count:
+        snapshot, _ = REGISTRY.collect(None, collector, names=EXPORT_COLLECTORS)
+        yield time.time(), snapshot
+        produced += 1
+        next_tick += interval
+        delay = next_tick - time.monotonic()
+        if delay < 0:
+            next_tick = time.monotonic()
+        elif count is None or produced < count:
+            time.sleep(delay)
+
+
+def metric_records(samples, precision=EXPORT_PRECISION):
+    """Aplatit chaque instantané en `{"ts": ..., "memory.used_percent": ..., ...}`."""
+    for timestamp, snapshot in samples:
+        record = {"ts": round(timestamp, 3)}
+        for name, value in snapshot_metrics(snapshot).items():
+            record[name] = None if math.isnan(value) else round(value, precision)
+        yield record
+
+
+def encode_jsonl(records):
+    """Génère `(en-tête, ligne)` ; le format JSON Lines n'a pas d'en-tête."""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for record in records:
+        yield None, dumps(record) + "\n"
+
+
+def encode_csv(records):
+    """Génère `(en-tête, ligne)`.
+
+    Une métrique absente d'un échantillon laisse sa cellule vide ; seule
+    l'apparition d'une nouvelle métrique (interface branchée, disque
+    ajouté...) produit un nouvel en-tête, qui conserve les colonnes connues.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    columns = {}
+    header = None
+    for record in records:
+        if not record.keys() <= columns.keys():
+            # dict ordonné utilisé comme ensemble ordonné des colonnes
+            columns.update(dict.fromkeys(record))
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(columns)
+            header = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(["" if (value := record.get(column)) is None else value for column in columns])
+        yield header, buffer.getvalue()
+
+
+class RotatingWriter:
+    """Écrivain tamponné avec vidage périodique et rotation par taille.
+
+    Les lignes s'accumulent dans le tampon du fichier et ne sont vidées que
+    toutes les `flush_interval` secondes : un échantillon par seconde ne
+    coûte pas un appel système par ligne. Quand le fichier dépasse
+    `max_bytes`, il est renommé en `.1` (les anciens en `.2`, ... jusqu'à
+    `backups`) et un nouveau fichier commence, précédé de l'en-tête courant.
+    `path="-"` écrit sur la sortie standard, sans rotation.
+    """
+
+    def __init__(self, path="-", max_bytes=EXPORT_MAX_BYTES, backups=EXPORT_BACKUPS,
+                 flush_interval=EXPORT_FLUSH_INTERVAL, buffer_size=EXPORT_BUFFER_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.rotations = 0
+        self._header = None
+        self._file = None
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._open()
+
+    def _open(self):
+        if self.path == "-":
+            self._file = sys.stdout
+            self._size = 0
+            return
+        self._file = open(self.path, "a", buffering=self.buffer_size, encoding="utf-8", newline="")
+        self._size = self._file.tell()
+        if self._size == 0:
+            # Fichier neuf : l'en-tête devra être réécrit
+            self._header = None
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+
+    def _write(self, text):
+        self._file.write(text)
+        self._size += len(text.encode("utf-8")) if not text.isascii() else len(text)
+
+    def write(self, line, header=None):
+        if header is not None and header != self._header:
+            # Nouveau schéma CSV : un fichier ne mélange jamais deux en-têtes
+            if self.path != "-" and self._size > 0:
+                self._rotate()
+            self._write(header)
+            self._header = header
+        elif self.path != "-" and self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+            if header is not None:
+                self._write(header)
+                self._header = header
+
+        self._write(line)
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+        finally:
+            if self._file is not sys.stdout:
+                self._file.close()
+            self._file = None
+
+
+def run_export(fmt="jsonl", path="-", interval=1.0, count=None, max_bytes=EXPORT_MAX_BYTES,
+               backups=EXPORT_BACKUPS, flush_interval=EXPORT_FLUSH_INTERVAL, collector=None):
+    """Boucle du mode --export : renvoie le nombre d'enregistrements écrits."""
+    encode = encode_csv if fmt == "csv" else encode_jsonl
+    lines = encode(metric_records(sample_stream(collector, interval, count)))
+    writer = RotatingWriter(path, max_bytes, backups, flush_interval)
+    written = 0
+    try:
+        for header, line in lines:
+            writer.write(line, header)
+            written += 1
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # Lecteur fermé (ex. `| head`) : fin normale de l'export, sans
+        # erreur au vidage de sys.stdout à la sortie de l'interpréteur
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return written
+    finally:
+        try:
+            writer.close()
+        except BrokenPipeError:
+            pass
+    if path != "-":
+        print(f"Export terminé : {written} enregistrements dans {path} ({writer.rotations} rotations).",
+              file=sys.stderr)
+    return written
@@ -0,0 +1,277 @@
+# stat_fleet.py
+
+"""Mode flotte : agents légers sur chaque machine, un agrégateur central.
+
+Protocole (TCP, connexion persistante) : le client envoie la ligne
+`SNAPSHOT\n`, l'agent répond par une trame `u32 longueur (gros-boutiste)`
+suivie de l'instantané en JSON compressé par zlib. Le client peut répéter la
+requête sur la même connexion.
+
+    python stat_reporter.py --agent --port 9121
+    python stat_reporter.py --fleet 10.0.0.5:9121 10.0.0.6:9121 --output flotte.html
+"""
+
+import asyncio
+import html
+import json
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+
+from stat_reporter import (REGISTRY, SYSTEM_COLLECTORS, SystemCollector, TIMEOUT_MARKER, _to_float,
+                           load_template, parse_service_target)
+from stat_server import SnapshotCache
+
+AGENT_HOST = "127.0.0.1"
+AGENT_PORT = 9121
+AGENT_MAX_AGE = 5.0
+FLEET_DEADLINE = 3.0
+FLEET_CONCURRENCY = 256
+FLEET_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "flotte.html")
+FLEET_MAX_FRAME = 16 * 1024 * 1024
+
+# Sections envoyées par l'agent : de quoi classer les machines, sans la table des processus
+FLEET_SECTIONS = ('general', 'memory', 'disk', 'cpu')
+REQUEST = b"SNAPSHOT\n"
+_FRAME = struct.Struct(">I")
+
+
+# --- Agent ---
+
+class _RegistrySource:
+    """Source d'instantanés pour SnapshotCache limitée aux sections de la flotte."""
+
+    def __init__(self, collector=None, sections=FLEET_SECTIONS):
+        self.collector = collector or SystemCollector()
+        self.sections = sections
+
+    def latest_snapshot(self):
+        snapshot, _ = REGISTRY.collect(self.sections, self.collector, names=SYSTEM_COLLECTORS)
+        return snapshot
+
+
+def encode_frame(snapshot):
+    payload = zlib.compress(json.dumps(snapshot, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    return _FRAME.pack(len(payload)) + payload
+
+
+async def read_frame(reader):
+    size, = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    if size > FLEET_MAX_FRAME:
+        raise ValueError(f"trame trop grande ({size} octets)")
+    return json.loads(zlib.decompress(await reader.readexactly(size)))
+
+
+async def _serve_agent(cache, reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while await reader.readline() == REQUEST:
+            # La collecte est bloquante : hors de la boucle d'événements
+            snapshot = await loop.run_in_executor(None, cache.get)
+            writer.write(encode_frame(snapshot))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+        # Client parti, ou agent arrêté pendant l'attente d'une requête
+        pass
+    finally:
+        writer.close()
+
+
+async def start_agent(host=AGENT_HOST, port=AGENT_PORT, max_age=AGENT_MAX_AGE, collector=None):
+    """Démarre un agent dans la boucle courante ; renvoie le serveur asyncio."""
+    cache = SnapshotCache(max_age, source=_RegistrySource(collector))
+    return await asyncio.start_server(lambda r, w: _serve_agent(cache, r, w), host, port)
+
+
+def run_agent(host=AGENT_HOST, port=AGENT_PORT, max_age=AGENT_MAX_AGE, collector=None):
+    async def main():
+        server = await start_agent(host, port, max_age, collector)
+        bound_host, bound_port = server.sockets[0].getsockname()[:2]
+        print(f"Agent de flotte à l'écoute sur {bound_host}:{bound_port}.")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Arrêt de l'agent.")
+
+
+# --- Agrégateur ---
+
+class FleetAggregator:
+    """Interroge des centaines d'agents en parallèle, connexions réutilisées d'un tour à l'autre.
+
+    Chaque hôte a sa propre échéance (`deadline`) : un agent lent ou
+    injoignable est marqué en erreur sans retarder les autres. Une connexion
+    réutilisée qui échoue est rouverte une fois dans la même échéance.
+    """
+
+    def __init__(self, targets, deadline=FLEET_DEADLINE, concurrency=FLEET_CONCURRENCY):
+        self.targets = list(targets)
+        self.deadline = deadline
+        self.concurrency = concurrency
+        self.connections = {}
+        self.connects = 0
+
+    async def _connect(self, target):
+        reader, writer = await asyncio.open_connection(*target)
+        self.connects += 1
+        self.connections[target] = (reader, writer)
+        return reader, writer
+
+    def _drop(self, target):
+        connection = self.connections.pop(target, None)
+        if connection is not None:
+            connection[1].close()
+
+    async def _request(self, target):
+        reused = target in self.connections
+        reader, writer = self.connections[target] if reused else await self._connect(target)
+        try:
+            writer.write(REQUEST)
+            await writer.drain()
+            return await read_frame(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self._drop(target)
+            if not reused:
+                raise
+            # L'agent a pu fermer une connexion inactive : nouvelle tentative
+            reader, writer = await self._connect(target)
+            writer.write(REQUEST)
+            await writer.drain()
+            return await read_frame(reader)
+
+    async def _poll_one(self, target, semaphore):
+        async with semaphore:
+            result = {"target": f"{target[0]}:{target[1]}", "snapshot": None, "error": None, "latency_ms": None}
+            start = time.perf_counter()
+            try:
+                result["snapshot"] = await asyncio.wait_for(self._request(target), self.deadline)
+                result["latency_ms"] = (time.perf_counter() - start) * 1000
+            except asyncio.TimeoutError:
+                # Réponse éventuellement à moitié lue : la connexion n'est plus utilisable
+                self._drop(target)
+                result["error"] = TIMEOUT_MARKER
+            except (OSError, ValueError, zlib.error, asyncio.IncompleteReadError) as e:
+                self._drop(target)
+                result["error"] = getattr(e, "strerror", None) or str(e) or type(e).__name__
+            return result
+
+    async def poll(self):
+        """Un tour de collecte sur toute la flotte ; un résultat par cible."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._poll_one(target, semaphore) for target in self.targets))
+
+    def close(self):
+        for target in list(self.connections):
+            self._drop(target)
+
+
+def host_severity(result):
+    """Clé de tri : (injoignable, pire taux d'occupation disque ou mémoire)."""
+    snapshot = result["snapshot"]
+    if snapshot is None:
+        return (1, 100.0)
+    worst = _to_float(snapshot.get("memory", {}).get("used_percent", 0))
+    for disk in snapshot.get("disks", []):
+        if "Error" not in disk:
+            worst = max(worst, _to_float(disk.get("percent", 0)))
+    return (0, 0.0 if math.isnan(worst) else worst)
+
+
+def _state_class(percent):
+    return "etat-critique" if percent > 90 else "etat-avertissement" if percent > 70 else "etat-ok"
+
+
+def build_fleet_rows(results):
+    rows = []
+    for result in sorted(results, key=host_severity, reverse=True):
+        target = html.escape(result["target"])
+        snapshot = result["snapshot"]
+        if snapshot is None:
+            rows.append(f"""
+            <tr>
+                <td>N/D</td>
+                <td>{target}</td>
+                <td colspan="5" class="message-erreur">Injoignable : {html.escape(result["error"])}</td>
+            </tr>
+            """)
+            continue
+
+        general = snapshot.get("general", {})
+        memory = snapshot.get("memory", {})
+        mem_percent = _to_float(memory.get("used_percent", "N/D"))
+        disks = [d for d in snapshot.get("disks", []) if "Error" not in d]
+        fullest = max(disks, key=lambda d: _to_float(d.get("percent", 0)), default=None)
+        if fullest is not None:
+            disk_percent = _to_float(fullest["percent"])
+            disk_cell = (f'<td class="{_state_class(disk_percent)}">{html.escape(str(fullest["target"]))} : '
+                         f'{html.escape(str(fullest["percent"]))}</td>')
+        else:
+            disk_cell = '<td>N/D</td>'
+        cpu = html.escape(str(snapshot.get("cpu", {}).get("total", "N/D")))
+        mem_text = html.escape(str(memory.get("used_percent", "N/D")))
+        rows.append(f"""
+            <tr>
+                <td>{html.escape(str(general.get("hostname", "N/D")))}</td>
+                <td>{target}</td>
+                <td class="{_state_class(mem_percent)}">{mem_text}%</td>
+                {disk_cell}
+                <td>{cpu if cpu == "N/D" else f"{cpu}%"}</td>
+                <td>{html.escape(str(general.get("uptime", "N/D")))}</td>
+                <td>{result["latency_ms"]:.1f} ms</td>
+            </tr>
+            """)
+    if not rows:
+        return '<tr><td colspan="7" class="message-erreur" style="text-align:center;">Aucun agent configuré.</td></tr>'
+    return "".join(rows)
+
+
+def render_fleet_report(results, template_path=FLEET_TEMPLATE_PATH):
+    reachable = sum(1 for r in results if r["snapshot"] is not None)
+    return load_template(template_path).render({
+        "DATE_TEMPS": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "RESUME_FLOTTE": f"{reachable}/{len(results)} agents joignables",
+        "CORPS_TABLEAU_FLOTTE": build_fleet_rows(results),
+    })
+
+
+def run_fleet(targets, destination_file, deadline=FLEET_DEADLINE, interval=None):
+    """Agrège la flotte dans un rapport ; avec `interval`, recommence indéfiniment sur les mêmes connexions."""
+
+    async def main():
+        aggregator = FleetAggregator(targets, deadline)
+        try:
+            while True:
+                start = time.perf_counter()
+                results = await aggregator.poll()
+                try:
+                    with open(destination_file, "w", encoding="utf-8") as f:
+                        f.write(render_fleet_report(results))
+                except OSError as e:
+                    print(f"Erreur d'écriture du rapport ({destination_file}): {e}")
+                    sys.exit(1)
+                failed = [r["target"] for r in results if r["snapshot"] is None]
+                print(f"Rapport de flotte généré : {destination_file} ({len(results) - len(failed)}/{len(results)} "
+                      f"agents en {(time.perf_counter() - start) * 1000:.0f} ms, {aggregator.connects} connexions ouvertes)")
+                if failed:
+                    print(f"Agents injoignables : {', '.join(failed)}")
+                if interval is None:
+                    return
+                await asyncio.sleep(interval)
+        finally:
+            aggregator.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Arrêt de l'agrégateur.")
+
+
+def parse_fleet_targets(texts):
+    """Comme --ports : "9121" vise l'agent local, "hôte:9121" un agent distant."""
+    return [parse_service_target(text, AGENT_HOST) for text in texts]
@@ -0,0 +1,323 @@
+# stat_history.py
+
+"""Historique binaire compact des échantillons de SystemCollector.
+
+Format du fichier (ajout seul) :
+
+    en-tête   "STATHST1" | u32 taille de l'en-tête | u32 nombre de champs
+              | u8 ordre des octets (0 petit-boutiste, 1 gros-boutiste)
+              | noms des champs en UTF-8 séparés par "\\n", complétés à 8 octets
+    données   enregistrements de taille fixe : un float64 par champ,
+              le premier champ étant toujours "ts" (horodatage Unix)
+
+La lecture passe par `mmap` : une requête sur une plage de temps est une
+recherche dichotomique sur la colonne "ts" puis une tranche de memoryview,
+sans copie ni analyse du reste du fichier.
+
+    python stat_reporter.py --record historique.bin --interval 1
+    python stat_history.py historique.bin --since 3600 --field memory.used_percent
+"""
+
+import argparse
+import bisect
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from stat_reporter import REGISTRY, SystemCollector, _to_float, read_diskstats, read_net_dev
+
+HISTORY_MAGIC = b"STATHST1"
+_HEADER = struct.Struct("<8sIIB")
+_BYTE_ORDERS = {"little": 0, "big": 1}
+RECORD_FLUSH_INTERVAL = 5.0
+
+# Collecteurs du registre lus à chaque échantillon (les compteurs bruts sont lus à part)
+HISTORY_COLLECTORS = ("memory", "temps")
+MEMORY_FIELDS = ("used_percent", "used_gb", "cache_gb", "swap_used_percent")
+NET_FIELDS = ("rx_bytes", "rx_packets", "tx_bytes", "tx_packets")
+DISK_FIELDS = ("reads", "sectors_read", "ms_read", "writes", "sectors_written", "ms_write", "ms_busy", "ms_weighted")
+
+
+def collect_history_sample(collector):
+    """Échantillon aplati `{champ: flottant}` : mémoire, températures, compteurs bruts réseau et disques.
+
+    Les compteurs sont lus tels quels (cumulés depuis le démarrage) : les
+    débits se recalculent à la lecture sur n'importe quel intervalle.
+    """
+    sample = {"ts": time.time()}
+    data, _ = REGISTRY.collect(None, collector, names=HISTORY_COLLECTORS)
+    memory = data["memory"]
+    for key in MEMORY_FIELDS:
+        sample[f"memory.{key}"] = _to_float(memory[key])
+
+    temps = data["temps"]
+    if "Erreur" not in temps:
+        for name, value in temps.items():
+            # Valeurs rendues comme "40.0°C" : on ne garde que le nombre
+            value = _to_float(value)
+            if not math.isnan(value):
+                sample[f"temps.{name}"] = value
+
+    try:
+        for name, counters in read_net_dev(f"{collector.proc_root}/net/dev", collector.reader).items():
+            for key, value in zip(NET_FIELDS, counters):
+                sample[f"net.{name}.{key}"] = float(value)
+    except OSError:
+        pass
+    try:
+        disks = read_diskstats(f"{collector.proc_root}/diskstats", collector.reader, collector.sys_root,
+                               collector.inventory.refresh().disks)
+        for name, counters in disks.items():
+            for key, value in zip(DISK_FIELDS, counters):
+                sample[f"disk.{name}.{key}"] = float(value)
+    except OSError:
+        pass
+    return sample
+
+
+def _read_header(head):
+    """Analyse l'en-tête ; renvoie (champs, taille de l'en-tête, ordre des octets)."""
+    if len(head) < _HEADER.size:
+        raise ValueError("En-tête d'historique tronqué")
+    magic, header_size, field_count, order = _HEADER.unpack_from(head)
+    if magic != HISTORY_MAGIC:
+        raise ValueError("Ce fichier n'est pas un historique stat_reporter")
+    if len(head) < header_size:
+        raise ValueError("En-tête d'historique tronqué")
+    names = bytes(head[_HEADER.size:header_size]).rstrip(b"\0").decode("utf-8").split("\n")
+    if len(names) != field_count or names[0] != "ts":
+        raise ValueError("Schéma d'historique invalide")
+    return names, header_size, order
+
+
+def _encode_header(fields):
+    names = "\n".join(fields).encode("utf-8")
+    size = _HEADER.size + len(names)
+    padding = -size % 8
+    return _HEADER.pack(HISTORY_MAGIC, size + padding, len(fields), _BYTE_ORDERS[sys.byteorder]) + names + b"\0" * padding
+
+
+class HistoryWriter:
+    """Ajoute des enregistrements de taille fixe à un fichier d'historique.
+
+    Le schéma est fixé à la création du fichier (par le premier échantillon) ;
+    en reprise sur un fichier existant, son schéma est réutilisé. Une
+    métrique inconnue du schéma est ignorée (comptée dans `dropped`), une
+    métrique absente est enregistrée comme NaN. Un enregistrement partiel en
+    fin de fichier (arrêt brutal) est tronqué à l'ouverture.
+    """
+
+    def __init__(self, path, fields=None, flush_interval=RECORD_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.fields = None
+        self._file = None
+        self._record = None
+        self._last_flush = time.monotonic()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._resume()
+        elif fields is not None:
+            self._create(fields)
+
+    def _create(self, fields):
+        fields = ["ts"] + [name for name in fields if name != "ts"]
+        self._file = open(self.path, "wb")
+        self._file.write(_encode_header(fields))
+        self._setup(fields)
+
+    def _resume(self):
+        with open(self.path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) == _HEADER.size:
+                head += f.read(max(0, _HEADER.unpack(head)[1] - len(head)))
+            fields, header_size, order = _read_header(head)
+        if order != _BYTE_ORDERS[sys.byteorder]:
+            raise ValueError("Historique écrit avec un autre ordre des octets")
+        self._file = open(self.path, "r+b")
+        size = self._file.seek(0, os.SEEK_END)
+        record_size = 8 * len(fields)
+        complete = header_size + (size - header_size) // record_size * record_size
+        if complete != size:
+            self._file.truncate(complete)
+            self._file.seek(complete)
+        self._setup(fields)
+
+    def _setup(self, fields):
+        self.fields = fields
+        self._index = {name: i for i, name in enumerate(fields)}
+        self._record = array('d', [math.nan]) * len(fields)
+
+    def append(self, sample):
+        if self._file is None:
+            self._create(list(sample))
+        record = self._record
+        for i in range(len(record)):
+            record[i] = math.nan
+        index = self._index
+        for name, value in sample.items():
+            position = index.get(name)
+            if position is None:
+                self.dropped += 1
+            else:
+                record[position] = value
+        self._file.write(record)
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class HistoryReader:
+    """Lecture d'un historique par `mmap`, sans copie.
+
+    `column()` et `window()` renvoient des memoryview sur le fichier
+    projeté : elles doivent être libérées (`release()` ou fin de portée)
+    avant `close()`. `refresh()` reprojette le fichier s'il a grossi
+    pendant l'enregistrement.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self._view = None
+        self.refresh()
+
+    def refresh(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if self._map is not None and size == len(self._map):
+            return self
+        self._release()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        head = memoryview(self._map)
+        try:
+            self.fields, header_size, order = _read_header(head)
+            if order != _BYTE_ORDERS[sys.byteorder]:
+                raise ValueError("Historique écrit avec un autre ordre des octets")
+            self.width = len(self.fields)
+            self.count = (size - header_size) // (8 * self.width)
+            self._view = head[header_size:header_size + self.count * 8 * self.width].cast('d')
+        finally:
+            head.release()
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        # Colonne des horodatages : tranche à pas fixe, triée par construction
+        self.timestamps = self._view[0::self.width]
+        return self
+
+    def __len__(self):
+        return self.count
+
+    def span(self, start=None, end=None):
+        """Indices `[premier, dernier)` des enregistrements dont start <= ts < end."""
+        first = 0 if start is None else bisect.bisect_left(self.timestamps, start)
+        last = self.count if end is None else bisect.bisect_left(self.timestamps, end)
+        return first, max(first, last)
+
+    def column(self, name, start=None, end=None):
+        """Valeurs d'un champ sur une plage de temps (memoryview à pas fixe)."""
+        first, last = self.span(start, end)
+        offset = self._index[name]
+        return self._view[first * self.width + offset:last * self.width:self.width]
+
+    def window(self, start=None, end=None):
+        """Enregistrements complets d'une plage (memoryview plate, `width` valeurs par enregistrement)."""
+        first, last = self.span(start, end)
+        return self._view[first * self.width:last * self.width]
+
+    def record(self, position):
+        """Un enregistrement sous forme de dict `{champ: valeur}`."""
+        base = position * self.width
+        return dict(zip(self.fields, self._view[base:base + self.width].tolist()))
+
+    def _release(self):
+        for view in (getattr(self, "timestamps", None), self._view):
+            if view is not None:
+                view.release()
+        self._view = self.timestamps = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def close(self):
+        self._release()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def run_recorder(path, interval=1.0, count=None, collector=None):
+    """Boucle du mode --record : ajoute un échantillon toutes les `interval` secondes."""
+    collector = collector or SystemCollector()
+    writer = HistoryWriter(path)
+    written = 0
+    next_tick = time.monotonic()
+    print(f"Enregistrement de l'historique dans {path} toutes les {interval}s.")
+    try:
+        while count is None or written < count:
+            writer.append(collect_history_sample(collector))
+            written += 1
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+            elif count is None or written < count:
+                time.sleep(delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+    print(f"{written} échantillons enregistrés ({len(writer.fields or [])} champs, {writer.dropped} valeurs hors schéma).")
+    return written
+
+
+def _summary(values):
+    present = [v for v in values if not math.isnan(v)]
+    if not present:
+        return "N/D"
+    return f"min {min(present):.2f}  moy. {sum(present) / len(present):.2f}  max {max(present):.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interroge un historique binaire de stat_reporter.")
+    parser.add_argument("path", help="Fichier d'historique (créé par --record).")
+    parser.add_argument("--since", type=float, help="Ne garde que les N dernières secondes.")
+    parser.add_argument("--field", nargs='+', help="Champs à résumer (Défaut: liste des champs).")
+    args = parser.parse_args()
+
+    try:
+        reader = HistoryReader(args.path)
+    except (OSError, ValueError) as e:
+        print(f"Erreur : {e}")
+        sys.exit(1)
+    with reader:
+        start = time.time() - args.since if args.since is not None else None
+        first, last = reader.span(start)
+        print(f"{reader.count} enregistrements, {reader.width} champs ; {last - first} dans la plage demandée.")
+        if not args.field:
+            print("\n".join(reader.fields))
+            return
+        for name in args.field:
+            if name not in reader.fields:
+                print(f"{name:<40} champ inconnu")
+                continue
+            column = reader.column(name, start)
+            print(f"{name:<40} {_summary(column.tolist())}")
+            column.release()
+
+
+if __name__ == "__main__":
+    main()
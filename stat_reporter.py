@@ -1,11 +1,15 @@
 # Projet.py
 
-import time, socket, platform, subprocess, glob, re
+import time, socket, glob, re
+import os, heapq, pwd, html
+import queue, threading, math
+from array import array
 import sys
 import argparse
-from pathlib import Path
-import tkinter as tk
-from tkinter import ttk, messagebox
+from functools import lru_cache
+
+# tkinter n'est importé qu'au lancement de --gui (voir interface_graphique) :
+# le chemin du rapport en ligne de commande reste ainsi rapide à démarrer.
 
 
 # --- Fonctions Utilitaires ---
@@ -16,11 +20,14 @@ def _safe_read(path, default_value="N/D", conversion=str):
         with open(path, 'r') as f:
             return conversion(f.read().strip())
     except Exception:
+        PROFILER.count_error()
         return default_value
 
 
 def _safe_subprocess(cmd, default_value="N/D", timeout=5):
     """Exécute une commande externe en gérant les erreurs d'exécution."""
+    import subprocess
+    PROFILER.count_subprocess()
     try:
         result = subprocess.check_output(
             cmd,
@@ -30,16 +37,1624 @@ def _safe_subprocess(cmd, default_value="N/D", timeout=5):
         ).strip()
         return result
     except Exception:
+        PROFILER.count_error()
         return default_value
 
 
+# --- Instrumentation (--profile) ---
+
+class _ProfileStat:
+    __slots__ = ("calls", "wall", "cpu", "subprocesses", "errors")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.subprocesses = 0
+        self.errors = 0
+
+
+class _Measure:
+    """Contexte de mesure d'une étape : temps réel et temps CPU du thread courant."""
+    __slots__ = ("profiler", "name", "wall", "cpu")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack().append(self.name)
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        self.profiler._stack().pop()
+        with self.profiler._lock:
+            stat = self.profiler._stat(self.name)
+            stat.calls += 1
+            stat.wall += wall
+            stat.cpu += cpu
+            if exc_type is not None:
+                stat.errors += 1
+        return False
+
+
+class _NullMeasure:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_MEASURE = _NullMeasure()
+
+
+class Profiler:
+    """Compteurs par collecteur et par étape de rendu : temps réel, temps CPU,
+    nombre de processus lancés et d'erreurs absorbées (valeurs "N/D").
+
+    Désactivé par défaut : `measure()` renvoie alors un contexte vide et les
+    compteurs ne coûtent qu'un test de booléen. Les processus et erreurs
+    sont attribués à l'étape en cours dans le thread qui les déclenche.
+    """
+
+    OUTSIDE = "hors étape"
+
+    def __init__(self):
+        self.enabled = False
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _stat(self, name):
+        stat = self._stats.get(name)
+        if stat is None:
+            stat = self._stats[name] = _ProfileStat()
+        return stat
+
+    def measure(self, name):
+        return _Measure(self, name) if self.enabled else _NULL_MEASURE
+
+    def _count(self, field):
+        stack = self._stack()
+        name = stack[-1] if stack else self.OUTSIDE
+        with self._lock:
+            stat = self._stat(name)
+            setattr(stat, field, getattr(stat, field) + 1)
+
+    def count_subprocess(self):
+        if self.enabled:
+            self._count("subprocesses")
+
+    def count_error(self):
+        if self.enabled:
+            self._count("errors")
+
+    def rows(self):
+        """Lignes (étape, appels, temps réel ms, temps CPU ms, processus, erreurs), plus lente d'abord."""
+        with self._lock:
+            rows = [(name, st.calls, st.wall * 1000, st.cpu * 1000, st.subprocesses, st.errors)
+                    for name, st in self._stats.items()]
+        return sorted(rows, key=lambda row: -row[2])
+
+    def overhead(self):
+        """Coût global du moniteur lui-même : CPU du processus, pic de RSS, threads actifs."""
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {
+            "cpu_s": usage.ru_utime + usage.ru_stime,
+            "max_rss_mb": usage.ru_maxrss / 1024,
+            "threads": threading.active_count(),
+        }
+
+    def format_text(self):
+        lines = [f"{'Étape':<24} {'appels':>6} {'réel (ms)':>10} {'CPU (ms)':>9} {'proc.':>6} {'erreurs':>8}",
+                 "-" * 68]
+        for name, calls, wall, cpu, subprocesses, errors in self.rows():
+            lines.append(f"{name:<24} {calls:>6} {wall:>10.2f} {cpu:>9.2f} {subprocesses:>6} {errors:>8}")
+        overhead = self.overhead()
+        lines.append(f"Coût du moniteur : {overhead['cpu_s'] * 1000:.0f} ms CPU, "
+                     f"pic RSS {overhead['max_rss_mb']:.1f} Mo, {overhead['threads']} threads actifs")
+        return "\n".join(lines)
+
+
+PROFILER = Profiler()
+
+
+class SysfsReader:
+    """Lecteur de fichiers /proc et /sys interrogés à chaque échantillon.
+
+    Les descripteurs restent ouverts entre deux lectures et le contenu est
+    relu avec `os.preadv` à l'offset 0 dans un tampon réutilisé, ce qui évite
+    open/close et une allocation par valeur. Si le périphérique a disparu
+    (ENODEV, ESTALE...), le fichier est rouvert une fois avant d'abandonner.
+    Même interface que `_safe_read`.
+    """
+
+    def __init__(self, max_open=256, buffer_size=4096):
+        self.max_open = max_open
+        self._fds = {}
+        self._buffer = bytearray(buffer_size)
+        self._lock = threading.Lock()
+
+    def _open(self, path):
+        if len(self._fds) >= self.max_open:
+            # Au-delà de la limite, on ferme le plus ancien descripteur
+            oldest = next(iter(self._fds))
+            os.close(self._fds.pop(oldest))
+        fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        self._fds[path] = fd
+        return fd
+
+    def _forget(self, path):
+        fd = self._fds.pop(path, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _read_fd(self, fd):
+        buffer = self._buffer
+        size = os.preadv(fd, [buffer], 0)
+        while size == len(buffer):
+            # Fichier plus grand que le tampon : on l'agrandit et on relit depuis le début
+            buffer = self._buffer = bytearray(len(buffer) * 2)
+            size = os.preadv(fd, [buffer], 0)
+        return buffer[:size].decode("utf-8", "replace")
+
+    def read_raw(self, path):
+        """Contenu brut du fichier ; lève OSError s'il est illisible même après réouverture."""
+        with self._lock:
+            fd = self._fds.get(path)
+            if fd is not None:
+                try:
+                    return self._read_fd(fd)
+                except OSError:
+                    self._forget(path)
+            fd = self._open(path)
+            try:
+                return self._read_fd(fd)
+            except OSError:
+                self._forget(path)
+                raise
+
+    def read(self, path, default_value="N/D", conversion=str):
+        try:
+            return conversion(self.read_raw(path).strip())
+        except Exception:
+            PROFILER.count_error()
+            return default_value
+
+    def close(self):
+        with self._lock:
+            for path in list(self._fds):
+                self._forget(path)
+
+
+# --- Lecture Native de la Table des Processus ---
+
+PROCESS_LIMIT = 30
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@lru_cache(maxsize=4096)
+def _uid_to_user(uid):
+    """Résout un uid en nom d'utilisateur (résultat mis en cache)."""
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+def _parse_proc_stat(raw):
+    """Découpe /proc/<pid>/stat en (nom, champs après le nom).
+
+    Le nom est entre parenthèses et peut contenir des espaces : on coupe donc
+    sur la dernière ')' plutôt que sur les espaces.
+    """
+    start = raw.index('(')
+    end = raw.rindex(')')
+    return raw[start + 1:end], raw[end + 2:].split()
+
+
+class _ProcTicks:
+    """État CPU mémorisé pour un pid entre deux échantillons."""
+    __slots__ = ("start", "ticks")
+
+    def __init__(self, start, ticks):
+        self.start = start
+        self.ticks = ticks
+
+
+class CpuSampler:
+    """Calcule le %CPU réel sur l'intervalle entre deux lectures de /proc.
+
+    Conserve les compteurs utime+stime de chaque pid et les compteurs de
+    /proc/stat par cœur. Les pids disparus sont oubliés à chaque passage,
+    la mémoire reste donc proportionnelle au nombre de processus vivants.
+    Les deux états sont indépendants : `core_percents()` et un parcours des
+    pids peuvent tourner en même temps sous des verrous distincts.
+    """
+
+    def __init__(self, proc_root="/proc", reader=None):
+        self.proc_root = proc_root
+        self.reader = reader or SysfsReader(max_open=4)
+        self._procs = {}
+        self._seen = {}
+        self._last_scan = None
+        self._interval = None
+        self._cores = {}
+
+    def begin_scan(self):
+        now = time.monotonic()
+        self._interval = now - self._last_scan if self._last_scan is not None else None
+        self._last_scan = now
+        self._seen = {}
+
+    def observe(self, pid, start, ticks):
+        """Enregistre les ticks d'un pid et renvoie le %CPU sur l'intervalle (ou None)."""
+        previous = self._procs.get(pid)
+        if previous is not None and previous.start == start:
+            delta = ticks - previous.ticks
+            previous.ticks = ticks
+            self._seen[pid] = previous
+        else:
+            # Nouveau pid, ou pid réutilisé par un autre processus
+            delta = None
+            self._seen[pid] = _ProcTicks(start, ticks)
+
+        if delta is None or not self._interval:
+            return None
+        return delta / CLK_TCK / self._interval * 100
+
+    def end_scan(self):
+        self._procs = self._seen
+        self._seen = {}
+
+    def core_percents(self):
+        """Renvoie l'usage par cœur ("cpu" = total) depuis l'appel précédent."""
+        stat = self.reader.read(f"{self.proc_root}/stat", default_value="")
+        usage = {}
+        cores = {}
+        for line in stat.splitlines():
+            if not line.startswith("cpu"):
+                break
+            parts = line.split()
+            values = [int(v) for v in parts[1:]]
+            # idle + iowait ne comptent pas comme temps occupé
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            total = sum(values[:8])
+            cores[parts[0]] = (total - idle, total)
+
+            previous = self._cores.get(parts[0])
+            if previous is not None and total > previous[1]:
+                usage[parts[0]] = round((total - idle - previous[0]) / (total - previous[1]) * 100, 1)
+        self._cores = cores
+        return usage
+
+
+SMAPS_BUDGET = 0.025
+SMAPS_FIELDS = {"Pss": 0, "Private_Clean": 1, "Private_Dirty": 1, "Private_Hugetlb": 1, "Swap": 2}
+
+
+def read_smaps_rollup(pid, proc_root="/proc"):
+    """Renvoie (PSS, USS, swap) en Ko depuis /proc/<pid>/smaps_rollup ; lève OSError.
+
+    PSS répartit chaque page partagée entre les processus qui la partagent ;
+    USS ne compte que les pages privées (libérées si le processus se termine).
+    """
+    values = [0, 0, 0]
+    with open(f"{proc_root}/{pid}/smaps_rollup", "rb") as f:
+        for line in f:
+            key, _, rest = line.partition(b":")
+            index = SMAPS_FIELDS.get(key.decode("ascii", "replace"))
+            if index is not None:
+                values[index] += int(rest.split()[0])
+    return tuple(values)
+
+
+class _SmapsEntry:
+    """Dernière mesure smaps_rollup d'un pid ; `pss` vaut None si illisible (droits)."""
+    __slots__ = ("start", "pss", "uss", "swap")
+
+    def __init__(self, start, pss=None, uss=None, swap=None):
+        self.start = start
+        self.pss = pss
+        self.uss = uss
+        self.swap = swap
+
+
+class SmapsSampler:
+    """Mesure PSS/USS/swap par processus avec un budget de temps par tour.
+
+    Lire smaps_rollup oblige le noyau à parcourir toutes les pages d'un
+    processus : impossible de le faire pour tous les pids à chaque tour sur
+    une grosse machine. À chaque appel de `refresh()` :
+
+    1. les candidats au classement sont relus en premier, par RSS
+       décroissant. Comme PSS <= RSS, on s'arrête dès que le RSS passe sous
+       le `limit`-ième plus grand PSS connu : les suivants ne peuvent pas
+       entrer dans le classement ;
+    2. le budget restant fait tourner un curseur sur les autres pids, pour
+       que leur swap et leur PSS finissent par être connus.
+
+    Le coût par tour est donc borné par `budget` secondes, quelle que soit
+    la taille de la table des processus.
+    """
+
+    def __init__(self, proc_root="/proc", budget=SMAPS_BUDGET, limit=PROCESS_LIMIT):
+        self.proc_root = proc_root
+        self.budget = budget
+        self.limit = limit
+        self.reads = 0
+        self._entries = {}
+        self._cursor = 0
+
+    def _measure(self, pid, start):
+        entry = _SmapsEntry(start)
+        try:
+            entry.pss, entry.uss, entry.swap = read_smaps_rollup(pid, self.proc_root)
+        except PermissionError:
+            # Processus d'un autre utilisateur sans droits : on ne réessaie pas
+            pass
+        except (OSError, ValueError, IndexError):
+            # Processus terminé pendant la lecture
+            return
+        self.reads += 1
+        self._entries[pid] = entry
+
+    def refresh(self, rows):
+        """`rows` : tuples (rss_pages, pid, start_ticks) de tous les processus vivants."""
+        deadline = time.perf_counter() + self.budget
+        entries = self._entries
+        alive = {pid: start for _, pid, start in rows}
+        # Pids disparus ou réutilisés par un autre processus
+        for pid in [pid for pid, entry in entries.items() if alive.get(pid) != entry.start]:
+            del entries[pid]
+
+        known = [entry.pss for entry in entries.values() if entry.pss is not None]
+        floor_kb = heapq.nlargest(self.limit, known)[-1] if len(known) >= self.limit else 0
+        refreshed = set()
+        # Tas des seuls candidats au-dessus du plancher, dépilé par RSS décroissant
+        # jusqu'à l'échéance : pas de tri de toute la table à chaque tour
+        candidates = [(-rss, pid, start) for rss, pid, start in rows if rss * PAGE_SIZE // 1024 >= floor_kb]
+        heapq.heapify(candidates)
+        while candidates and time.perf_counter() < deadline:
+            _, pid, start = heapq.heappop(candidates)
+            entry = entries.get(pid)
+            if entry is None or entry.pss is not None:
+                self._measure(pid, start)
+            refreshed.add(pid)
+
+        pids = list(alive)
+        for _ in range(len(pids)):
+            if time.perf_counter() >= deadline:
+                break
+            self._cursor = (self._cursor + 1) % len(pids)
+            pid = pids[self._cursor]
+            if pid not in refreshed and (pid not in entries or entries[pid].pss is not None):
+                self._measure(pid, alive[pid])
+
+    def get(self, pid):
+        return self._entries.get(pid)
+
+
+def read_process_table(limit=PROCESS_LIMIT, proc_root="/proc", sampler=None, reader=None, smaps=None):
+    """Lit la table des processus directement dans /proc, sans fork de `ps`.
+
+    Renvoie les `limit` processus les plus gourmands en mémoire (RSS), triés
+    par un tas borné plutôt que par un tri complet. Avec un `CpuSampler`, le
+    %CPU est mesuré sur l'intervalle depuis l'appel précédent ; sinon (ou au
+    premier appel) c'est la moyenne sur la durée de vie, comme celui de `ps`.
+    Avec un `SmapsSampler`, le classement et le %MEM utilisent le PSS (RSS
+    tant qu'un processus n'a pas encore été mesuré) et chaque ligne indique
+    PSS, USS et swap. Lève OSError si /proc est illisible.
+    """
+    pids = [entry for entry in os.listdir(proc_root) if entry.isdigit()]
+
+    read = reader.read if reader is not None else _safe_read
+    uptime = read(f"{proc_root}/uptime", default_value=0.0, conversion=lambda x: float(x.split()[0]))
+    meminfo = read(f"{proc_root}/meminfo", default_value="")
+    match = re.search(r'MemTotal:\s+(\d+)', meminfo)
+    mem_total_bytes = int(match.group(1)) * 1024 if match else 0
+
+    if sampler is not None:
+        sampler.begin_scan()
+
+    rows = []
+    for pid in pids:
+        try:
+            with open(f"{proc_root}/{pid}/stat", 'r') as f:
+                name, fields = _parse_proc_stat(f.read())
+            uid = os.stat(f"{proc_root}/{pid}").st_uid
+        except (OSError, ValueError):
+            # Processus terminé entre le listage et la lecture
+            continue
+        # fields[0] = état (champ 3 de stat) ; utime/stime = champs 14/15, starttime = 22, rss = 24
+        pid = int(pid)
+        rss = int(fields[21])
+        cpu_ticks = int(fields[11]) + int(fields[12])
+        start_ticks = int(fields[19])
+        interval_cpu = sampler.observe(pid, start_ticks, cpu_ticks) if sampler is not None else None
+        rows.append((rss, pid, uid, cpu_ticks, start_ticks, interval_cpu, name))
+
+    if sampler is not None:
+        sampler.end_scan()
+
+    if smaps is not None:
+        smaps.refresh([(row[0], row[1], row[4]) for row in rows])
+
+        def memory_bytes(row):
+            entry = smaps.get(row[1])
+            return entry.pss * 1024 if entry is not None and entry.pss is not None else row[0] * PAGE_SIZE
+
+        top = heapq.nlargest(limit, rows, key=memory_bytes)
+    else:
+        top = heapq.nlargest(limit, rows)
+
+    processes = []
+    for rss, pid, uid, cpu_ticks, start_ticks, interval_cpu, name in top:
+        if interval_cpu is not None:
+            cpu = interval_cpu
+        else:
+            elapsed = uptime - start_ticks / CLK_TCK
+            cpu = (cpu_ticks / CLK_TCK) / elapsed * 100 if elapsed > 0 else 0.0
+        entry = smaps.get(pid) if smaps is not None else None
+        used = entry.pss * 1024 if entry is not None and entry.pss is not None else rss * PAGE_SIZE
+        mem = used / mem_total_bytes * 100 if mem_total_bytes else 0.0
+        process = {
+            "pid": str(pid),
+            "user": _uid_to_user(uid),
+            "cpu_percent": f"{cpu:.1f}%",
+            "mem_percent": f"{mem:.1f}%",
+            "name": name,
+        }
+        if smaps is not None:
+            measured = entry is not None and entry.pss is not None
+            process["pss"] = _human_size(entry.pss * 1024) if measured else "N/D"
+            process["uss"] = _human_size(entry.uss * 1024) if measured else "N/D"
+            process["swap"] = _human_size(entry.swap * 1024) if measured else "N/D"
+        processes.append(process)
+    return processes
+
+
+# --- Statistiques Réseau Natives ---
+
+SSID_CACHE_TTL = 60.0
+IFF_UP = 0x1
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891b
+
+
+def read_net_dev(path="/proc/net/dev", reader=None):
+    """Compteurs de /proc/net/dev : {interface: (rx_octets, rx_paquets, tx_octets, tx_paquets)}.
+
+    Lève OSError si le fichier est illisible.
+    """
+    raw = reader.read_raw(path) if reader is not None else open(path).read()
+    counters = {}
+    for line in raw.splitlines()[2:]:
+        name, _, values = line.partition(':')
+        fields = values.split()
+        if len(fields) >= 10:
+            counters[name.strip()] = (int(fields[0]), int(fields[1]), int(fields[8]), int(fields[9]))
+    return counters
+
+
+def _ipv4_address(name):
+    """Adresse IPv4/préfixe d'une interface via ioctl, sans fork de `ip` (None si aucune)."""
+    import fcntl, struct
+    ifreq = struct.pack('256s', name.encode()[:15])
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            address = fcntl.ioctl(sock.fileno(), SIOCGIFADDR, ifreq)[20:24]
+            netmask = fcntl.ioctl(sock.fileno(), SIOCGIFNETMASK, ifreq)[20:24]
+        except OSError:
+            return None
+    prefix = bin(int.from_bytes(netmask, 'big')).count('1')
+    return f"{socket.inet_ntoa(address)}/{prefix}"
+
+
+def _lookup_ssid(name):
+    """Interroge iwgetid puis iw pour le SSID d'une interface sans fil (None si inconnu)."""
+    ssid = _safe_subprocess(["iwgetid", "-r", name])
+    if not ssid or ssid == "N/D":
+        iw_output = _safe_subprocess(["iw", "dev", name, "link"])
+        match_ssid = re.search(r'SSID:\s+(.*)', iw_output)
+        ssid = match_ssid.group(1).strip() if match_ssid else None
+    return ssid or None
+
+
+class SsidCache:
+    """Cache des SSID avec durée de vie.
+
+    La première demande pour une interface est synchrone ; ensuite, une
+    valeur périmée est renvoyée telle quelle pendant qu'un thread la
+    rafraîchit, la boucle de collecte ne lance donc jamais de processus.
+    """
+
+    def __init__(self, ttl=SSID_CACHE_TTL, lookup=_lookup_ssid):
+        self.ttl = ttl
+        self.lookup = lookup
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _refresh(self, name):
+        ssid = self.lookup(name)
+        with self._lock:
+            self._entries[name] = (time.monotonic(), ssid)
+            self._refreshing.discard(name)
+        return ssid
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and (time.monotonic() - entry[0] < self.ttl or name in self._refreshing):
+                return entry[1]
+            if entry is not None:
+                self._refreshing.add(name)
+        if entry is None:
+            return self._refresh(name)
+        threading.Thread(target=self._refresh, args=(name,), name=f"ssid-{name}", daemon=True).start()
+        return entry[1]
+
+
+class NetworkSampler:
+    """Débits par interface calculés entre deux lectures de /proc/net/dev."""
+
+    def __init__(self, proc_root="/proc", sys_root="/sys", reader=None):
+        self.proc_root = proc_root
+        self.sys_root = sys_root
+        self.reader = reader or SysfsReader()
+        self.ssid_cache = SsidCache()
+        # HardwareInventory facultatif : évite un stat() par interface sans fil et par tick
+        self.inventory = None
+        self._previous = {}
+        self._previous_time = None
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """Renvoie {interface: statistiques} ; les débits valent None au premier appel."""
+        counters = read_net_dev(f"{self.proc_root}/net/dev", self.reader)
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._previous_time if self._previous_time is not None else None
+            previous = self._previous
+            # Seules les interfaces présentes sont conservées : les disparues sont oubliées
+            self._previous = counters
+            self._previous_time = now
+
+        stats = {}
+        for name, (rx_bytes, rx_packets, tx_bytes, tx_packets) in counters.items():
+            flags = self.reader.read(f"{self.sys_root}/class/net/{name}/flags", default_value=0,
+                                     conversion=lambda x: int(x, 16))
+            entry = {
+                "status": "UP" if flags & IFF_UP else "DOWN",
+                "rx_bytes": rx_bytes, "tx_bytes": tx_bytes,
+                "rx_packets": rx_packets, "tx_packets": tx_packets,
+                "rx_bytes_per_s": None, "tx_bytes_per_s": None,
+                "rx_packets_per_s": None, "tx_packets_per_s": None,
+            }
+            old = previous.get(name)
+            # Un compteur qui recule (interface recréée) ne donne pas de débit
+            if elapsed and old is not None and all(n >= o for n, o in zip(counters[name], old)):
+                entry["rx_bytes_per_s"] = (rx_bytes - old[0]) / elapsed
+                entry["rx_packets_per_s"] = (rx_packets - old[1]) / elapsed
+                entry["tx_bytes_per_s"] = (tx_bytes - old[2]) / elapsed
+                entry["tx_packets_per_s"] = (tx_packets - old[3]) / elapsed
+            stats[name] = entry
+        return stats
+
+    def is_wireless(self, name):
+        if self.inventory is not None:
+            return name in self.inventory.refresh().wireless
+        return os.path.isdir(f"{self.sys_root}/class/net/{name}/wireless")
+
+
+def _format_rate(bytes_per_s):
+    for unit in ("o/s", "Ko/s", "Mo/s"):
+        if bytes_per_s < 1024:
+            return f"{bytes_per_s:.1f} {unit}"
+        bytes_per_s /= 1024
+    return f"{bytes_per_s:.1f} Go/s"
+
+
+# --- Systèmes de Fichiers Natifs ---
+
+STATVFS_TIMEOUT = 2.0
+STATVFS_WORKERS = 4
+
+# Systèmes de fichiers virtuels ou sans intérêt pour l'occupation disque
+EXCLUDED_FSTYPES = {
+    'tmpfs', 'devtmpfs', 'squashfs', 'overlay', 'efivarfs', 'proc', 'sysfs', 'devpts', 'cgroup',
+    'cgroup2', 'securityfs', 'pstore', 'bpf', 'debugfs', 'tracefs', 'configfs', 'fusectl', 'mqueue',
+    'hugetlbfs', 'autofs', 'binfmt_misc', 'rpc_pipefs', 'nsfs', 'ramfs', 'selinuxfs',
+}
+
+
+def _unescape_mount_field(field):
+    """Décode les échappements octaux de mountinfo (\\040 pour une espace, etc.)."""
+    return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_mountinfo(raw):
+    """Renvoie la liste des montages réels : dicts {target, fstype, source, device}.
+
+    Les pseudo-systèmes de fichiers et les périphériques loop sont exclus, et
+    un même périphérique monté plusieurs fois (bind mounts) n'apparaît qu'une fois.
+    """
+    mounts = []
+    seen_devices = set()
+    for line in raw.splitlines():
+        left, sep, right = line.partition(' - ')
+        fields = left.split()
+        tail = right.split()
+        if not sep or len(fields) < 5 or len(tail) < 2:
+            continue
+        fstype, source = tail[0], _unescape_mount_field(tail[1])
+        if fstype in EXCLUDED_FSTYPES or fstype.startswith('fuse.') or source.startswith('/dev/loop'):
+            continue
+        device = fields[2]
+        if device in seen_devices:
+            continue
+        seen_devices.add(device)
+        mounts.append({
+            "target": _unescape_mount_field(fields[4]),
+            "fstype": fstype,
+            "source": source,
+            "device": device,
+        })
+    return mounts
+
+
+class _StatvfsBatch:
+    __slots__ = ("results", "remaining", "condition")
+
+    def __init__(self, count):
+        self.results = {}
+        self.remaining = count
+        self.condition = threading.Condition()
+
+
+class StatvfsPool:
+    """Exécute os.statvfs dans des threads de travail, avec un délai par lot.
+
+    Un montage qui ne répond pas (NFS bloqué...) est marqué en délai dépassé
+    et n'est plus interrogé tant que son appel précédent n'est pas revenu ;
+    un thread de remplacement est créé pour que les autres montages
+    continuent d'être servis.
+    """
+
+    def __init__(self, workers=STATVFS_WORKERS):
+        self.workers = workers
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._hung = set()
+        self._alive = 0
+        for _ in range(workers):
+            self._spawn()
+
+    def _spawn(self):
+        with self._lock:
+            self._alive += 1
+        threading.Thread(target=self._work, name="statvfs", daemon=True).start()
+
+    def _work(self):
+        while True:
+            path, batch = self._tasks.get()
+            try:
+                result = os.statvfs(path)
+            except OSError as e:
+                result = e
+            with batch.condition:
+                batch.results[path] = result
+                batch.remaining -= 1
+                batch.condition.notify()
+            with self._lock:
+                if path in self._hung:
+                    # Appel bloqué enfin revenu : un remplaçant tourne déjà, ce thread s'arrête
+                    self._hung.discard(path)
+                    if self._alive > self.workers:
+                        self._alive -= 1
+                        return
+
+    def statvfs_many(self, paths, timeout=STATVFS_TIMEOUT):
+        """Renvoie {chemin: os.statvfs_result | OSError | None (délai dépassé)}."""
+        with self._lock:
+            hung = {path for path in paths if path in self._hung}
+        todo = [path for path in paths if path not in hung]
+
+        batch = _StatvfsBatch(len(todo))
+        for path in todo:
+            self._tasks.put((path, batch))
+        with batch.condition:
+            batch.condition.wait_for(lambda: batch.remaining == 0, timeout)
+            results = dict(batch.results)
+
+        late = [path for path in todo if path not in results]
+        if late:
+            with self._lock:
+                self._hung.update(late)
+            for _ in late:
+                self._spawn()
+        return {path: results.get(path) for path in paths}
+
+
+def _human_size(num_bytes):
+    """Taille lisible à la manière de `df -h` (puissances de 1024, arrondi au-dessus)."""
+    size = float(num_bytes)
+    for unit in ("", "K", "M", "G", "T", "P"):
+        if size < 1024 or unit == "P":
+            if unit == "":
+                return f"{int(size)}"
+            return f"{math.ceil(size * 10) / 10:.1f}{unit}" if size < 10 else f"{math.ceil(size)}{unit}"
+        size /= 1024
+
+
+class MountTable:
+    """Table des montages analysée une fois puis relue seulement si elle change.
+
+    Le noyau signale toute modification de la table des montages par
+    POLLPRI/POLLERR sur un descripteur ouvert de /proc/self/mounts.
+    """
+
+    def __init__(self, proc_root="/proc"):
+        import select
+        self.proc_root = proc_root
+        self._mounts = None
+        self._lock = threading.Lock()
+        self._fd = None
+        self._poller = None
+        try:
+            self._fd = os.open(f"{proc_root}/self/mounts", os.O_RDONLY | os.O_CLOEXEC)
+            self._poller = select.poll()
+            self._poller.register(self._fd, select.POLLPRI | select.POLLERR)
+        except (OSError, AttributeError):
+            # Pas de notification possible : on relira mountinfo à chaque appel
+            self._poller = None
+
+    def _changed(self):
+        if self._poller is None:
+            return True
+        return bool(self._poller.poll(0))
+
+    def mounts(self):
+        """Liste des montages ; lève OSError si mountinfo est illisible."""
+        with self._lock:
+            if self._mounts is None or self._changed():
+                with open(f"{self.proc_root}/self/mountinfo", "r") as f:
+                    self._mounts = parse_mountinfo(f.read())
+            return self._mounts
+
+
+# --- Activité des Disques (E/S) ---
+
+# Préfixes des périphériques blocs physiques (loop, ram, zram... sont ignorés)
+DISK_PREFIXES = ("sd", "hd", "vd", "xvd", "nvme", "mmcblk", "md")
+DISKSTATS_SECTOR = 512
+DISKIO_FIRST_INTERVAL = 0.25
+
+
+def is_whole_disk(name, sys_root="/sys"):
+    """Vrai pour un disque entier (sda, nvme0n1, mmcblk0), faux pour une partition.
+
+    /sys/block ne contient que les disques entiers ; les partitions y sont
+    des sous-dossiers, pas des entrées de premier niveau.
+    """
+    return name.startswith(DISK_PREFIXES) and os.path.exists(f"{sys_root}/block/{name}")
+
+
+def read_diskstats(path="/proc/diskstats", reader=None, sys_root="/sys", disks=None):
+    """Compteurs bruts de /proc/diskstats pour les disques entiers.
+
+    Renvoie {disque: (lectures, secteurs_lus, ms_lecture, écritures,
+    secteurs_écrits, ms_écriture, ms_occupé, ms_pondéré)}. `disks` (les
+    disques d'un HardwareInventory) évite un stat() de /sys/block par ligne.
+    Lève OSError si le fichier est illisible.
+    """
+    raw = reader.read_raw(path) if reader is not None else open(path).read()
+    counters = {}
+    for line in raw.splitlines():
+        fields = line.split()
+        if len(fields) < 14:
+            continue
+        if not (fields[2] in disks if disks is not None else is_whole_disk(fields[2], sys_root)):
+            continue
+        values = [int(v) for v in fields[3:14]]
+        counters[fields[2]] = (values[0], values[2], values[3], values[4], values[6], values[7], values[9], values[10])
+    return counters
+
+
+class DiskIOSampler:
+    """IOPS, débit, latence moyenne et taux d'occupation calculés entre deux lectures."""
+
+    def __init__(self, proc_root="/proc", sys_root="/sys", reader=None):
+        self.proc_root = proc_root
+        self.sys_root = sys_root
+        self.reader = reader or SysfsReader()
+        # HardwareInventory facultatif : fournit la liste des disques entiers sans stat() par tick
+        self.inventory = None
+        self._previous = None
+        self._previous_time = None
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """Renvoie {disque: statistiques}, ou None s'il n'y a pas encore d'échantillon précédent."""
+        disks = self.inventory.refresh().disks if self.inventory is not None else None
+        counters = read_diskstats(f"{self.proc_root}/diskstats", self.reader, self.sys_root, disks)
+        with self._lock:
+            now = time.monotonic()
+            previous, previous_time = self._previous, self._previous_time
+            self._previous, self._previous_time = counters, now
+        if previous is None or now <= previous_time:
+            return None
+
+        elapsed = now - previous_time
+        stats = {}
+        for name, current in counters.items():
+            old = previous.get(name)
+            if old is None or any(c < o for c, o in zip(current, old)):
+                continue
+            reads, sectors_read, ms_read, writes, sectors_written, ms_write, ms_busy, ms_weighted = (
+                c - o for c, o in zip(current, old))
+            ios = reads + writes
+            stats[name] = {
+                "read_iops": reads / elapsed,
+                "write_iops": writes / elapsed,
+                "read_bytes_per_s": sectors_read * DISKSTATS_SECTOR / elapsed,
+                "write_bytes_per_s": sectors_written * DISKSTATS_SECTOR / elapsed,
+                # Temps moyen d'une requête (file d'attente + service), comme await d'iostat
+                "await_ms": (ms_read + ms_write) / ios if ios else 0.0,
+                "queue_depth": ms_weighted / (elapsed * 1000),
+                "util_percent": min(100.0, ms_busy / (elapsed * 1000) * 100),
+            }
+        return stats
+
+
+# --- Sonde GPU ---
+
+GPU_LOOP_MS = 2000
+GPU_FIRST_READ_TIMEOUT = 3.0
+GPU_RETRY_AFTER = 300.0
+GPU_STALE_AFTER = 15.0
+
+
+class GpuProbe:
+    """Températures NVIDIA lues depuis un seul `nvidia-smi --loop-ms` persistant.
+
+    Au lieu de relancer nvidia-smi à chaque tick, un processus unique est
+    démarré et un thread lit sa sortie en continu. L'absence de GPU (commande
+    introuvable, pilote absent, sortie vide) est mémorisée pendant
+    `retry_after` secondes : les appels suivants ne coûtent alors plus aucun fork.
+    Le processus vit jusqu'à `close()` ; les collecteurs partagent donc une
+    seule sonde, arrêtée à la sortie (voir `shared_gpu_probe`).
+    """
+
+    def __init__(self, loop_ms=GPU_LOOP_MS, retry_after=GPU_RETRY_AFTER,
+                 first_read_timeout=GPU_FIRST_READ_TIMEOUT):
+        self.loop_ms = loop_ms
+        self.retry_after = retry_after
+        self.first_read_timeout = first_read_timeout
+        self._lock = threading.Lock()
+        self._process = None
+        self._values = {}
+        self._updated = 0.0
+        self._first_read = threading.Event()
+        self._unavailable_until = 0.0
+
+    def _start(self):
+        import shutil, subprocess
+        executable = shutil.which("nvidia-smi")
+        if executable is None:
+            return False
+        PROFILER.count_subprocess()
+        try:
+            process = subprocess.Popen(
+                [executable, "--query-gpu=index,temperature.gpu", "--format=csv,noheader,nounits",
+                 f"--loop-ms={self.loop_ms}"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, text=True,
+            )
+        except OSError:
+            return False
+        self._process = process
+        self._first_read.clear()
+        threading.Thread(target=self._read_loop, args=(process,), name="nvidia-smi", daemon=True).start()
+        return True
+
+    def _read_loop(self, process):
+        for line in process.stdout:
+            parts = [p.strip() for p in line.split(',')]
+            if len(parts) == 2 and parts[1].isdigit():
+                with self._lock:
+                    self._values[parts[0]] = int(parts[1])
+                    self._updated = time.monotonic()
+                self._first_read.set()
+        # Fin du flux : pilote absent, GPU retiré ou processus tué
+        process.wait()
+        with self._lock:
+            if self._process is process:
+                self._process = None
+                self._values = {}
+                self._unavailable_until = time.monotonic() + self.retry_after
+        self._first_read.set()
+
+    def temperatures(self):
+        """Renvoie {index_gpu: température °C} ; vide si aucun GPU NVIDIA n'est disponible."""
+        with self._lock:
+            now = time.monotonic()
+            if self._process is None:
+                if now < self._unavailable_until:
+                    return {}
+                if not self._start():
+                    self._unavailable_until = now + self.retry_after
+                    return {}
+            process = self._process
+
+        if not self._first_read.wait(self.first_read_timeout):
+            # nvidia-smi muet : on l'arrête plutôt que de réattendre à chaque appel
+            self.close()
+            with self._lock:
+                self._unavailable_until = time.monotonic() + self.retry_after
+            return {}
+        with self._lock:
+            if self._process is process and self._values and now - self._updated > GPU_STALE_AFTER:
+                # Plus aucune ligne depuis longtemps : on considère la sonde bloquée
+                self._values = {}
+            return dict(self._values)
+
+    def close(self):
+        with self._lock:
+            process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(1)
+            except Exception:
+                process.kill()
+
+
+_shared_gpu_probe = None
+_shared_gpu_lock = threading.Lock()
+
+
+def shared_gpu_probe():
+    """Sonde GPU commune au processus, créée au premier appel et arrêtée à la sortie."""
+    global _shared_gpu_probe
+    with _shared_gpu_lock:
+        if _shared_gpu_probe is None:
+            import atexit
+            _shared_gpu_probe = GpuProbe()
+            atexit.register(_shared_gpu_probe.close)
+        return _shared_gpu_probe
+
+
+# --- Inventaire Matériel ---
+
+INVENTORY_RESCAN_INTERVAL = 60.0
+GPU_HWMON_NAMES = ("amdgpu", "radeon", "nouveau")
+
+
+class HardwareInventory:
+    """Faits statiques découverts une fois : capteurs, périphériques et chemins.
+
+    Le nom d'hôte, le noyau, les zones thermiques, les hwmon GPU, les sources
+    d'alimentation, les interfaces et les disques ne changent presque jamais ;
+    les collecteurs ne relisent donc à chaque tick que les valeurs qui
+    bougent, depuis des chemins déjà résolus. L'inventaire est refait si le
+    mtime d'un dossier de /sys/class change, ou au plus tard toutes les
+    `rescan_interval` secondes (sysfs ne met pas toujours ses mtime à jour).
+    """
+
+    WATCHED_DIRS = ("class/thermal", "class/hwmon", "class/power_supply", "class/net", "block")
+
+    def __init__(self, sys_root="/sys", rescan_interval=INVENTORY_RESCAN_INTERVAL):
+        self.sys_root = sys_root
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._scanned_at = None
+        self._mtimes = None
+        self.scans = 0
+
+        self.hostname = "N/D"
+        self.kernel = "N/D"
+        self.thermal_sensors = []
+        self.gpu_hwmon = []
+        self.power_supplies = []
+        self.interfaces = []
+        self.wireless = set()
+        self.disks = {}
+
+    def _dir_mtimes(self):
+        mtimes = []
+        for directory in self.WATCHED_DIRS:
+            try:
+                mtimes.append(os.stat(f"{self.sys_root}/{directory}").st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return mtimes
+
+    def _scan(self, mtimes):
+        root = self.sys_root
+        uname = os.uname()
+        self.hostname = socket.gethostname()
+        self.kernel = f"{uname.sysname} {uname.release}"
+
+        # (nom affiché, chemin de la valeur) pour chaque zone thermique
+        sensors = []
+        for path in sorted(glob.glob(f"{root}/class/thermal/thermal_zone*/temp")):
+            zone_dir = os.path.dirname(path)
+            name = _safe_read(f"{zone_dir}/type", default_value=os.path.basename(zone_dir))
+            sensors.append((name.capitalize(), path))
+        self.thermal_sensors = sensors
+
+        gpus = []
+        for path in sorted(glob.glob(f"{root}/class/hwmon/hwmon*")):
+            name = _safe_read(f"{path}/name", default_value="").strip()
+            if name in GPU_HWMON_NAMES:
+                gpus.append((f"GPU ({name.upper()})", f"{path}/temp1_input"))
+        self.gpu_hwmon = gpus
+
+        self.power_supplies = (sorted(glob.glob(f"{root}/class/power_supply/B*"))
+                               + sorted(glob.glob(f"{root}/class/power_supply/A*")))
+
+        net_dirs = sorted(glob.glob(f"{root}/class/net/*"))
+        self.interfaces = [os.path.basename(path) for path in net_dirs]
+        self.wireless = {os.path.basename(path) for path in net_dirs if os.path.isdir(f"{path}/wireless")}
+
+        disks = {}
+        for path in sorted(glob.glob(f"{root}/block/*")):
+            name = os.path.basename(path)
+            if not is_whole_disk(name, root):
+                continue
+            sectors = _safe_read(f"{path}/size", default_value=0, conversion=int)
+            disks[name] = {
+                "model": _safe_read(f"{path}/device/model", default_value="Inconnu"),
+                "size_bytes": sectors * 512,
+                "rotational": _safe_read(f"{path}/queue/rotational", default_value="0") == "1",
+            }
+        self.disks = disks
+
+        self._mtimes = mtimes
+        self._scanned_at = time.monotonic()
+        self.scans += 1
+
+    def refresh(self, force=False):
+        """Refait l'inventaire si nécessaire ; renvoie l'inventaire lui-même."""
+        with self._lock:
+            mtimes = self._dir_mtimes()
+            expired = (self._scanned_at is None
+                       or time.monotonic() - self._scanned_at >= self.rescan_interval)
+            if force or expired or mtimes != self._mtimes:
+                self._scan(mtimes)
+        return self
+
+
+# --- Groupes de Contrôle (cgroup v2) ---
+
+CGROUP_LIMIT = 30
+CGROUP_RESCAN_INTERVAL = 300.0
+CGROUP_FIRST_INTERVAL = 0.25
+# Descripteurs gardés ouverts sur memory.current, cpu.stat et io.stat
+CGROUP_MAX_OPEN = 512
+
+
+def find_cgroup2_root(sys_root="/sys"):
+    """Point de montage de la hiérarchie cgroup v2, ou None.
+
+    En mode unifié, c'est /sys/fs/cgroup ; en mode hybride (v1 + v2), la
+    hiérarchie v2 est montée sous /sys/fs/cgroup/unified.
+    """
+    for root in (f"{sys_root}/fs/cgroup", f"{sys_root}/fs/cgroup/unified"):
+        if os.path.exists(f"{root}/cgroup.controllers"):
+            return root
+    return None
+
+
+def parse_cpu_stat(raw):
+    """Temps CPU cumulé (µs) d'un cpu.stat."""
+    for line in raw.splitlines():
+        if line.startswith("usage_usec "):
+            return int(line.split()[1])
+    return 0
+
+
+def parse_io_stat(raw):
+    """Octets lus et écrits (cumulés) d'un io.stat, tous périphériques confondus."""
+    read_bytes = write_bytes = 0
+    for line in raw.splitlines():
+        # "8:0 rbytes=1234 wbytes=5678 rios=1 wios=2 dbytes=0 dios=0"
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes":
+                read_bytes += int(value)
+            elif key == "wbytes":
+                write_bytes += int(value)
+    return read_bytes, write_bytes
+
+
+class _CgroupEntry:
+    """Chemins d'un cgroup résolus au balayage et compteurs de l'échantillon précédent."""
+    __slots__ = ("path", "directory", "memory", "cpu", "io", "memory_max", "previous")
+
+    def __init__(self, path, directory, memory, cpu, io, memory_max):
+        self.path = path
+        self.directory = directory
+        self.memory = memory
+        self.cpu = cpu
+        self.io = io
+        self.memory_max = memory_max
+        self.previous = None
+
+
+class CgroupTree:
+    """Arborescence cgroup v2 parcourue une fois, puis relue fichier par fichier.
+
+    Le balayage (scandir récursif) ne se refait que si le nombre de
+    descendants de la racine (`nr_descendants` de cgroup.stat) change, si un
+    cgroup connu a disparu entre deux lectures, ou au plus tard toutes les
+    `rescan_interval` secondes. Les limites (memory.max) sont lues au
+    balayage. L'appartenance des processus vient de /proc/<pid>/cgroup, lu
+    une seule fois par pid puis gardé jusqu'à la disparition du processus ou
+    au balayage suivant.
+    """
+
+    def __init__(self, root, proc_root="/proc", reader=None, rescan_interval=CGROUP_RESCAN_INTERVAL):
+        self.root = root
+        self.proc_root = proc_root
+        self.reader = reader or SysfsReader(max_open=CGROUP_MAX_OPEN)
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._descendants = None
+        self._scanned_at = None
+        self._stale = False
+        self._pid_cgroups = {}
+        self._previous_time = None
+        self.scans = 0
+
+    def _nr_descendants(self):
+        raw = self.reader.read(f"{self.root}/cgroup.stat", default_value="")
+        for line in raw.splitlines():
+            if line.startswith("nr_descendants "):
+                return int(line.split()[1])
+        return None
+
+    def _scan(self, descendants):
+        previous = self._entries
+        entries = {}
+        pending = [("/", self.root)]
+        while pending:
+            path, directory = pending.pop()
+            files = set()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            child = f"{path.rstrip('/')}/{entry.name}"
+                            pending.append((child, entry.path))
+                        else:
+                            files.add(entry.name)
+            except OSError:
+                # Supprimé pendant le parcours
+                continue
+            memory_max = None
+            if "memory.max" in files:
+                memory_max = _safe_read(f"{directory}/memory.max", default_value=None,
+                                        conversion=lambda x: None if x == "max" else int(x))
+            entry = _CgroupEntry(path, directory, "memory.current" in files, "cpu.stat" in files,
+                                 "io.stat" in files, memory_max)
+            old = previous.get(path)
+            if old is not None:
+                entry.previous = old.previous
+            entries[path] = entry
+        self._entries = entries
+        self._descendants = descendants
+        self._scanned_at = time.monotonic()
+        self._stale = False
+        # Des processus ont pu changer de groupe : leur appartenance sera relue
+        self._pid_cgroups = {}
+        self.scans += 1
+
+    def refresh(self, force=False):
+        """Refait le balayage si des cgroups ont été créés ou supprimés."""
+        descendants = self._nr_descendants()
+        expired = (self._scanned_at is None
+                   or time.monotonic() - self._scanned_at >= self.rescan_interval)
+        if force or expired or self._stale or descendants != self._descendants:
+            self._scan(descendants)
+        return self
+
+    def cgroup_of(self, pid):
+        """Chemin cgroup v2 (ligne "0::") d'un processus, depuis le cache si possible."""
+        path = self._pid_cgroups.get(pid)
+        if path is None:
+            try:
+                with open(f"{self.proc_root}/{pid}/cgroup", "r") as f:
+                    raw = f.read()
+            except OSError:
+                return None
+            for line in raw.splitlines():
+                if line.startswith("0::"):
+                    path = self._pid_cgroups[pid] = line[3:]
+                    break
+        return path
+
+    def _process_counts(self):
+        counts = {}
+        pids = [name for name in os.listdir(self.proc_root) if name.isdigit()]
+        for pid in pids:
+            path = self.cgroup_of(pid)
+            if path is not None:
+                counts[path] = counts.get(path, 0) + 1
+        # Oublie les processus terminés : un pid réutilisé plus tard sera relu
+        cache = self._pid_cgroups
+        self._pid_cgroups = {pid: cache[pid] for pid in pids if pid in cache}
+        return counts
+
+    def sample(self):
+        """Renvoie [statistiques par cgroup], ou None s'il n'y a pas encore d'échantillon précédent.
+
+        Le CPU est en % d'un cœur (comme top), les E/S en octets/s, sur
+        l'intervalle depuis l'appel précédent. La racine de l'hôte, qui n'a
+        pas de memory.current, est ignorée.
+        """
+        with self._lock:
+            self.refresh()
+            counts = self._process_counts()
+            now = time.monotonic()
+            previous_time, self._previous_time = self._previous_time, now
+            elapsed = now - previous_time if previous_time is not None else 0.0
+
+            read_raw = self.reader.read_raw
+            stats = []
+            for path, entry in self._entries.items():
+                if path == "/" and not entry.memory:
+                    continue
+                try:
+                    memory = int(read_raw(f"{entry.directory}/memory.current")) if entry.memory else None
+                    usage = parse_cpu_stat(read_raw(f"{entry.directory}/cpu.stat")) if entry.cpu else 0
+                    io = parse_io_stat(read_raw(f"{entry.directory}/io.stat")) if entry.io else (0, 0)
+                except (OSError, ValueError):
+                    # Cgroup supprimé depuis le balayage : l'arborescence sera relue
+                    self._stale = True
+                    continue
+                old, entry.previous = entry.previous, (usage, io[0], io[1])
+                cpu_percent = read_rate = write_rate = None
+                if old is not None and elapsed > 0:
+                    if entry.cpu:
+                        cpu_percent = max(0, usage - old[0]) / (elapsed * 1e6) * 100
+                    if entry.io:
+                        read_rate = max(0, io[0] - old[1]) / elapsed
+                        write_rate = max(0, io[1] - old[2]) / elapsed
+                stats.append({
+                    "path": path,
+                    "memory_bytes": memory,
+                    "memory_max_bytes": entry.memory_max,
+                    "cpu_percent": cpu_percent,
+                    "io_read_bytes_per_s": read_rate,
+                    "io_write_bytes_per_s": write_rate,
+                    "processes": counts.get(path, 0),
+                })
+        return stats if previous_time is not None else None
+
+
+# --- Sonde de Services (asyncio) ---
+
+SERVICE_HOST = '127.0.0.1'
+# Cibles de get_web_services sans --ports
+DEFAULT_SERVICE_TARGETS = ((SERVICE_HOST, 80), (SERVICE_HOST, 443))
+SERVICE_PROBE_TIMEOUT = 0.5
+SERVICE_PROBE_CONCURRENCY = 64
+# Démarrage de la boucle asyncio et résolution des noms, en plus des connexions
+SERVICE_DEADLINE_MARGIN = 1.5
+PORT_LABELS = {21: "FTP", 22: "SSH", 25: "SMTP", 80: "HTTP", 443: "HTTPS", 3306: "MySQL", 5432: "PostgreSQL"}
+
+
+def parse_service_target(text, default_host=SERVICE_HOST):
+    """Convertit "443", "hôte:443" ou "[::1]:443" en (hôte, port) ; lève ValueError sinon."""
+    host, sep, port = text.rpartition(':')
+    if not sep:
+        host, port = default_host, text
+    elif ':' in host and not (host.startswith('[') and host.endswith(']')):
+        # "::1" se couperait en (":", 1) : une adresse IPv6 doit être entre crochets
+        raise ValueError(f"adresse IPv6 sans crochets ou sans port : {text!r} (forme attendue : [adresse]:port)")
+    host = host.strip('[]') or default_host
+    port = int(port)
+    if not 0 < port < 65536:
+        raise ValueError(f"port invalide : {port}")
+    return host, port
+
+
+def service_key(host, port):
+    """Clé d'un service dans les résultats : le port seul pour l'hôte local, "hôte:port" sinon."""
+    return port if host == SERVICE_HOST else f"{host}:{port}"
+
+
+def service_probe_deadline(target_count, banner_bytes=0):
+    """Délai accordé à la sonde de services selon le nombre de cibles.
+
+    Les cibles sont sondées par lots de SERVICE_PROBE_CONCURRENCY, chaque lot
+    durant au plus SERVICE_PROBE_TIMEOUT (deux attentes avec la bannière).
+    """
+    batches = max(1, math.ceil(target_count / SERVICE_PROBE_CONCURRENCY))
+    return batches * SERVICE_PROBE_TIMEOUT * (2 if banner_bytes else 1) + SERVICE_DEADLINE_MARGIN
+
+
+def probe_services(targets, timeout=SERVICE_PROBE_TIMEOUT, concurrency=SERVICE_PROBE_CONCURRENCY, banner_bytes=0):
+    """Teste en parallèle une liste de cibles (hôte, port) avec asyncio.
+
+    Au plus `concurrency` connexions sont ouvertes en même temps ; la durée
+    totale est donc celle de la cible la plus lente (par vague de
+    `concurrency`), pas la somme des délais. Renvoie un dict par cible avec
+    l'état, la latence de connexion et, si `banner_bytes`, la bannière lue.
+    """
+    import asyncio
+
+    async def probe_one(host, port, semaphore):
+        async with semaphore:
+            result = {"host": host, "port": port, "open": False, "latency_ms": None, "banner": None, "error": None}
+            start = time.perf_counter()
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            except asyncio.TimeoutError:
+                result["error"] = TIMEOUT_MARKER
+                return result
+            except OSError as e:
+                result["error"] = e.strerror or str(e)
+                return result
+
+            result["open"] = True
+            result["latency_ms"] = (time.perf_counter() - start) * 1000
+            if banner_bytes:
+                # Beaucoup de services (SSH, SMTP, FTP) s'annoncent dès la connexion
+                try:
+                    data = await asyncio.wait_for(reader.read(banner_bytes), timeout)
+                    result["banner"] = data.decode("utf-8", "replace").strip()
+                except (asyncio.TimeoutError, OSError):
+                    result["banner"] = ""
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return result
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(probe_one(host, port, semaphore) for host, port in targets))
+
+    return asyncio.run(run_all()) if targets else []
+
+
+# --- Collecte Parallèle ---
+
+# Délai maximal (en secondes) accordé à chaque section avant de la marquer incomplète.
+COLLECTOR_TIMEOUTS = {
+    "general": 1.0,
+    "memory": 1.0,
+    "cpu": 1.0,
+    "temps": 6.0,
+    "power": 1.0,
+    "processes": 6.0,
+    "disks": 6.0,
+    "disk_io": 2.0,
+    "network": 6.0,
+    # Pour les cibles par défaut ; chaque SystemCollector recalcule le sien (service_probe_deadline)
+    "web_services": service_probe_deadline(len(DEFAULT_SERVICE_TARGETS)),
+    "cgroups": 6.0,
+}
+DEFAULT_COLLECTOR_TIMEOUT = 3.0
+
+TIMEOUT_MARKER = "Délai dépassé"
+
+
+def _fallback_value(section, message):
+    """Valeur de remplacement compatible avec le rendu quand une section échoue."""
+    fallbacks = {
+        "general": lambda: {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "hostname": "N/D",
+                            "kernel": "N/D", "uptime": message},
+        "memory": lambda: {"total_gb": "N/D", "used_gb": "N/D", "cache_gb": "N/D", "used_percent": 0,
+                           "swap_total_gb": "N/D", "swap_used_percent": 0},
+        "cpu": lambda: {"Erreur": message},
+        "temps": lambda: {"Erreur": message},
+        "power": lambda: {"source": "N/D", "status": message, "capacity": "N/D"},
+        "processes": lambda: [],
+        "disks": lambda: [{"Error": message}],
+        "disk_io": lambda: {"Erreur": message},
+        "network": lambda: {"status": message, "interfaces": []},
+        "web_services": lambda: {service_key(host, port): message for host, port in DEFAULT_SERVICE_TARGETS},
+    }
+    return fallbacks[section]() if section in fallbacks else {"Erreur": message}
+
+
+def collect_parallel(tasks, timeouts=None, default_timeout=DEFAULT_COLLECTOR_TIMEOUT, fallback=_fallback_value):
+    """Exécute les collecteurs en parallèle, chacun avec sa propre échéance.
+
+    `tasks` associe un nom de section à une fonction sans argument. Renvoie
+    `(data, incomplete)` où `incomplete` liste les sections remplacées par une
+    valeur de repli `fallback(section, message)` (délai dépassé ou exception).
+    """
+    timeouts = COLLECTOR_TIMEOUTS if timeouts is None else timeouts
+    data = {}
+    incomplete = []
+    if not tasks:
+        return data, incomplete
+
+    # Un thread démon par section plutôt que concurrent.futures (qui importe
+    # logging) : le démarrage reste léger et un collecteur bloqué ne retient
+    # pas la sortie de l'interpréteur.
+    results = {}
+
+    def run(name, func):
+        try:
+            with PROFILER.measure(f"collecte.{name}"):
+                results[name] = (True, func())
+        except Exception as e:
+            results[name] = (False, e)
+
+    start = time.monotonic()
+    threads = {}
+    for name, func in tasks.items():
+        thread = threading.Thread(target=run, args=(name, func), name=f"collecte-{name}", daemon=True)
+        thread.start()
+        threads[name] = thread
+
+    for name, thread in threads.items():
+        deadline = start + timeouts.get(name, default_timeout)
+        thread.join(max(0.0, deadline - time.monotonic()))
+        outcome = results.get(name)
+        if outcome is None:
+            # Collecteur retardataire : son résultat éventuel sera ignoré
+            data[name] = fallback(name, TIMEOUT_MARKER)
+            incomplete.append(name)
+        elif outcome[0]:
+            data[name] = outcome[1]
+        else:
+            data[name] = fallback(name, f"Erreur: {outcome[1]}")
+            incomplete.append(name)
+
+    return data, incomplete
+
+
+# --- Registre des Collecteurs par Section ---
+
+# Sections du rapport HTML, dans l'ordre de l'option --sections
+REPORT_SECTIONS = ('general', 'memory', 'hardware', 'process', 'disk', 'network', 'cgroup')
+
+
+class CollectorRegistry:
+    """Associe chaque section à ses collecteurs et à leur coût relatif.
+
+    Un collecteur est soit un nom de méthode, résolu sur l'objet source
+    passé à `tasks()`/`collect()` (un SystemCollector), soit une fonction
+    sans argument. Seuls les collecteurs des sections demandées sont lancés,
+    les plus coûteux en premier : ce sont eux qui fixent la durée totale.
+    `names` restreint en plus la collecte à certains collecteurs (l'interface
+    graphique n'affiche pas les disques, l'export ne sonde pas les ports...).
+    """
+
+    def __init__(self):
+        self._collectors = {}
+        self._sections = {}
+
+    def register(self, section, name, target, cost=1):
+        self._collectors[name] = (target, cost)
+        names = self._sections.setdefault(section, [])
+        if name not in names:
+            names.append(name)
+
+    def sections(self):
+        return list(self._sections)
+
+    def collectors_for(self, sections=None, names=None):
+        """Noms des collecteurs nécessaires, du plus coûteux au moins coûteux ; None = tous."""
+        if sections is None:
+            sections = self._sections
+        selected = dict.fromkeys(name for section in sections for name in self._sections.get(section, ())
+                                 if names is None or name in names)
+        return sorted(selected, key=lambda name: -self._collectors[name][1])
+
+    def cost(self, sections=None, names=None):
+        return sum(self._collectors[name][1] for name in self.collectors_for(sections, names))
+
+    def tasks(self, sections=None, source=None, names=None):
+        tasks = {}
+        for name in self.collectors_for(sections, names):
+            target = self._collectors[name][0]
+            tasks[name] = getattr(source, target) if isinstance(target, str) else target
+        return tasks
+
+    def collect(self, sections=None, source=None, timeouts=None, names=None):
+        """Collecte en parallèle les sections demandées ; renvoie `(data, incomplete)`.
+
+        Sans `timeouts`, les délais et valeurs de repli de la source (un
+        SystemCollector) sont utilisés s'il en a.
+        """
+        if timeouts is None:
+            timeouts = getattr(source, "timeouts", None)
+        fallback = getattr(source, "fallback_value", _fallback_value)
+        return collect_parallel(self.tasks(sections, source, names), timeouts, fallback=fallback)
+
+
+REGISTRY = CollectorRegistry()
+REGISTRY.register('general', 'general', 'get_general_info', cost=1)
+REGISTRY.register('memory', 'memory', 'get_memory_stats', cost=1)
+REGISTRY.register('hardware', 'temps', 'get_temperatures', cost=2)
+REGISTRY.register('hardware', 'power', 'get_power_supply', cost=1)
+REGISTRY.register('process', 'processes', 'get_process_list', cost=8)
+REGISTRY.register('disk', 'disks', 'get_disk_usage', cost=5)
+REGISTRY.register('disk', 'disk_io', 'get_disk_io', cost=2)
+REGISTRY.register('network', 'network', 'get_network_info', cost=4)
+REGISTRY.register('network', 'web_services', 'get_web_services', cost=5)
+REGISTRY.register('cgroup', 'cgroups', 'get_cgroups', cost=4)
+# Hors rapport HTML : instantanés du démon, du serveur et de l'interface
+REGISTRY.register('cpu', 'cpu', 'get_cpu_usage', cost=1)
+# Collecteurs de SystemCollector : d'autres scripts enregistrent les leurs dans le
+# même registre, ils ne doivent pas se retrouver dans les instantanés de stat_reporter
+SYSTEM_COLLECTORS = tuple(REGISTRY.collectors_for())
+
+
 # --- Classe de Collecte de Données ---
 
 class SystemCollector:
+    def __init__(self, proc_root="/proc", sys_root="/sys", service_targets=DEFAULT_SERVICE_TARGETS,
+                 banner_bytes=0, memory_accounting="rss", smaps_budget=SMAPS_BUDGET):
+        # Racines configurables : permettent de collecter sur une arborescence factice (stat_bench.py)
+        self.proc_root = proc_root
+        self.sys_root = sys_root
+        # Cibles testées par get_web_services (--ports, --banner)
+        self.service_targets = list(service_targets)
+        self.banner_bytes = banner_bytes
+        # "rss" (défaut) ou "pss" : classement des processus par smaps_rollup (--pss)
+        self.memory_accounting = memory_accounting
+        self.smaps_budget = smaps_budget
+        # L'échéance de web_services dépend du nombre de cibles et de la lecture de bannière
+        self.timeouts = dict(COLLECTOR_TIMEOUTS, web_services=service_probe_deadline(len(self.service_targets),
+                                                                                   banner_bytes))
+        # Descripteurs réutilisés pour les fichiers relus à chaque échantillon
+        self.reader = SysfsReader()
+        # Conserve les compteurs CPU entre deux collectes (GUI, mode continu)
+        self.cpu_sampler = CpuSampler(proc_root, reader=self.reader)
+        self.network_sampler = NetworkSampler(proc_root, sys_root, reader=self.reader)
+        self._mount_table = None
+        self._statvfs_pool = None
+        self.disk_io_sampler = DiskIOSampler(proc_root, sys_root, reader=self.reader)
+        self.gpu_probe = shared_gpu_probe()
+        self.inventory = HardwareInventory(sys_root)
+        self.network_sampler.inventory = self.inventory
+        self.disk_io_sampler.inventory = self.inventory
+        # Une collecte en retard peut encore tourner quand la suivante démarre. Un verrou
+        # par état partagé : le parcours de /proc ne doit pas retarder l'usage CPU par cœur.
+        self._cpu_lock = threading.Lock()
+        self._process_lock = threading.Lock()
+        self._cgroup_lock = threading.Lock()
+        self._smaps_sampler = None
+        self._cgroup_tree = None
+
+    def fallback_value(self, section, message):
+        """Comme _fallback_value, avec les cibles de service de ce collecteur."""
+        if section == "web_services":
+            return {service_key(host, port): message for host, port in self.service_targets}
+        return _fallback_value(section, message)
 
     def get_general_info(self):
         report_time = time.strftime("%Y-%m-%d %H:%M:%S")
-        uptime_sec = _safe_read("/proc/uptime", default_value=0.0, conversion=lambda x: float(x.split()[0]))
+        uptime_sec = self.reader.read(f"{self.proc_root}/uptime", default_value=0.0, conversion=lambda x: float(x.split()[0]))
         if uptime_sec != 0.0:
             h = int(uptime_sec // 3600)
             m = int((uptime_sec % 3600) // 60)
@@ -48,15 +1663,16 @@ class SystemCollector:
         else:
             uptime_str = "Erreur de lecture de l'uptime"
 
+        inventory = self.inventory.refresh()
         return {
             "time": report_time,
-            "hostname": socket.gethostname(),
-            "kernel": f"{platform.system()} {platform.release()}",
+            "hostname": inventory.hostname,
+            "kernel": inventory.kernel,
             "uptime": uptime_str,
         }
 
     def get_memory_stats(self):
-        meminfo = _safe_read("/proc/meminfo", default_value="")
+        meminfo = self.reader.read(f"{self.proc_root}/meminfo", default_value="")
         mem_values = {}
         for line in meminfo.splitlines():
             match = re.match(r'(\w+):\s+(\d+)', line)
@@ -86,49 +1702,43 @@ class SystemCollector:
             "swap_used_percent": swap_percent,
         }
 
+    def get_cpu_usage(self):
+        """Usage CPU global et par cœur sur l'intervalle depuis l'appel précédent."""
+        with self._cpu_lock:
+            usage = self.cpu_sampler.core_percents()
+        return {
+            "total": usage.pop("cpu", "N/D"),
+            "cores": usage,
+        }
+
     def get_temperatures(self):
         temps = {}
         gpu_found = False
 
-        # 1. Scan des zones thermiques génériques (CPU, Carte Mère, etc.)
-        for path in glob.glob("/sys/class/thermal/thermal_zone*/temp"):
-            try:
-                name_path = path.replace('temp', 'type')
-                sensor_name = _safe_read(name_path, default_value=path.split('/')[-2])
-                temp_raw = _safe_read(path, conversion=int)
+        inventory = self.inventory.refresh()
 
-                if isinstance(temp_raw, int):
-                    temps[sensor_name.capitalize()] = f"{temp_raw / 1000:.1f}°C"
-            except Exception:
-                continue
+        # 1. Zones thermiques génériques (CPU, Carte Mère, etc.), chemins issus de l'inventaire
+        for sensor_name, path in inventory.thermal_sensors:
+            temp_raw = self.reader.read(path, conversion=int)
+            if isinstance(temp_raw, int):
+                temps[sensor_name] = f"{temp_raw / 1000:.1f}°C"
 
-                # 2. Essai NVIDIA (Pilote propriétaire)
-        gpu_temp_raw = _safe_subprocess(
-            ["nvidia-smi", "--query-gpu=temperature.gpu", "--format=csv,noheader,nounits"]
-        )
-        if gpu_temp_raw.isdigit():
-            temps["GPU (NVIDIA)"] = f"{gpu_temp_raw}°C"
+        # 2. Essai NVIDIA (Pilote propriétaire), via le nvidia-smi persistant
+        nvidia_temps = self.gpu_probe.temperatures()
+        for index, gpu_temp in nvidia_temps.items():
+            label = "GPU (NVIDIA)" if len(nvidia_temps) == 1 else f"GPU (NVIDIA) #{index}"
+            temps[label] = f"{gpu_temp}°C"
             gpu_found = True
 
         # 3. Essai AMD / Intel / Nouveau (Via HWMON standard)
         # Si on n'a pas déjà trouvé une NVIDIA, on cherche ailleurs
         if not gpu_found:
-            for path in glob.glob("/sys/class/hwmon/hwmon*"):
-                try:
-                    # On lit le nom du périphérique (ex: amdgpu, coretemp, radeon)
-                    name = _safe_read(f"{path}/name", default_value="").strip()
-
-                    # Si le nom indique un GPU
-                    if name in ["amdgpu", "radeon", "nouveau"]:
-                        # La température est souvent dans temp1_input (en millidegrés)
-                        temp_path = f"{path}/temp1_input"
-                        temp_raw = _safe_read(temp_path, conversion=int)
-
-                        if isinstance(temp_raw, int):
-                            temps[f"GPU ({name.upper()})"] = f"{temp_raw / 1000:.1f}°C"
-                            gpu_found = True
-                except Exception:
-                    continue
+            for label, temp_path in inventory.gpu_hwmon:
+                # La température est souvent dans temp1_input (en millidegrés)
+                temp_raw = self.reader.read(temp_path, conversion=int)
+                if isinstance(temp_raw, int):
+                    temps[label] = f"{temp_raw / 1000:.1f}°C"
+                    gpu_found = True
 
         # 4. Si aucun GPU n'a été trouvé après tous les tests
         if not gpu_found:
@@ -142,30 +1752,35 @@ class SystemCollector:
         return temps if temps else {"Erreur": "Aucun capteur thermique trouvé."}
 
     def get_power_supply(self):
-        power_paths = glob.glob("/sys/class/power_supply/B*") + glob.glob("/sys/class/power_supply/A*")
-        power_data = []
+        power_paths = self.inventory.refresh().power_supplies
 
         if not power_paths:
             return {"source": "N/D", "status": "Non-portable", "capacity": "N/D"}
 
-        for path in power_paths:
-            name = path.split('/')[-1]
-            status = _safe_read(f"{path}/status", default_value="Inconnu")
-            capacity = _safe_read(f"{path}/capacity", default_value="N/D")
+        # Seule la première source (batterie en priorité) est rapportée
+        path = power_paths[0]
+        status = self.reader.read(f"{path}/status", default_value="Inconnu")
+        capacity = self.reader.read(f"{path}/capacity", default_value="N/D")
 
-            capacity_str = f"{capacity}%" if capacity.isdigit() else capacity
+        capacity_str = f"{capacity}%" if capacity.isdigit() else capacity
 
-            power_data.append({
-                "source": name,
-                "status": status,
-                "capacity": capacity_str
-            })
-            if name.startswith("BAT") or name.startswith("AC"):
-                break
-
-        return power_data[0] if power_data else {"source": "N/D", "status": "N/D", "capacity": "N/D"}
+        return {
+            "source": os.path.basename(path),
+            "status": status,
+            "capacity": capacity_str
+        }
 
     def get_process_list(self):
+        try:
+            with self._process_lock:
+                if self.memory_accounting == "pss" and self._smaps_sampler is None:
+                    self._smaps_sampler = SmapsSampler(self.proc_root, self.smaps_budget)
+                return read_process_table(proc_root=self.proc_root, sampler=self.cpu_sampler, reader=self.reader,
+                                          smaps=self._smaps_sampler)
+        except OSError:
+            # /proc indisponible : on se rabat sur `ps`
+            pass
+
         cmd = ["ps", "-e", "-o", "pid,user,%cpu,%mem,comm", "--sort=-%mem"]
         output = _safe_subprocess(cmd)
 
@@ -194,6 +1809,55 @@ class SystemCollector:
         return processes
 
     def get_disk_usage(self):
+        # Créés à la première utilisation : un rapport sans section disque n'en paie pas le coût
+        if self._mount_table is None:
+            self._mount_table = MountTable(self.proc_root)
+            self._statvfs_pool = StatvfsPool()
+        try:
+            mounts = self._mount_table.mounts()
+        except OSError:
+            return self._disk_usage_from_df()
+
+        results = self._statvfs_pool.statvfs_many([m["target"] for m in mounts])
+        data = []
+        for mount in mounts:
+            st = results[mount["target"]]
+            if isinstance(st, OSError):
+                continue
+            entry = {"target": mount["target"], "fstype": mount["fstype"], "device": mount["source"]}
+            if st is None:
+                entry.update({"size": "N/D", "used": "N/D", "available": "N/D", "percent": TIMEOUT_MARKER,
+                              "size_bytes": None, "used_bytes": None, "available_bytes": None})
+                data.append(entry)
+                continue
+            if st.f_blocks == 0:
+                # Système de fichiers sans blocs (pseudo-fs non listé) : ignoré, comme df
+                continue
+
+            size = st.f_blocks * st.f_frsize
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            available = st.f_bavail * st.f_frsize
+            # Même calcul que df : part utilisée de l'espace accessible aux utilisateurs, arrondie au-dessus
+            usable = used + available
+            percent = math.ceil(used * 100 / usable) if usable else 0
+            entry.update({
+                "size": _human_size(size),
+                "used": _human_size(used),
+                "available": _human_size(available),
+                "percent": f"{percent}%",
+                "size_bytes": size,
+                "used_bytes": used,
+                "available_bytes": available,
+            })
+            data.append(entry)
+
+        if not data:
+            return [{"Error": "Aucun disque physique détecté (vérifiez les filtres)."}]
+
+        return data
+
+    def _disk_usage_from_df(self):
+        """Ancienne méthode par `df -hT`, utilisée si mountinfo est illisible."""
         output = _safe_subprocess(["df", "-hT"])
 
         if "N/D" in output:
@@ -224,7 +1888,76 @@ class SystemCollector:
 
         return data
 
+    def get_disk_io(self):
+        """Activité E/S par disque ; au premier appel, deux lectures rapprochées sont faites."""
+        try:
+            stats = self.disk_io_sampler.sample()
+            if stats is None:
+                time.sleep(DISKIO_FIRST_INTERVAL)
+                stats = self.disk_io_sampler.sample()
+        except OSError:
+            return {"Erreur": "Impossible de lire /proc/diskstats."}
+        if not stats:
+            return {"Erreur": "Aucun disque physique détecté."}
+        return stats
+
+    def get_cgroups(self):
+        """Mémoire, CPU et E/S par cgroup v2 (services, conteneurs), les plus gourmands en mémoire d'abord."""
+        with self._cgroup_lock:
+            if self._cgroup_tree is None:
+                root = find_cgroup2_root(self.sys_root)
+                if root is None:
+                    return {"Erreur": "Hiérarchie cgroup v2 introuvable."}
+                self._cgroup_tree = CgroupTree(root, self.proc_root)
+        tree = self._cgroup_tree
+        try:
+            stats = tree.sample()
+            if stats is None:
+                time.sleep(CGROUP_FIRST_INTERVAL)
+                stats = tree.sample()
+        except OSError:
+            return {"Erreur": f"Impossible de parcourir {tree.root}."}
+        if not stats:
+            return {"Erreur": "Aucun cgroup avec comptabilité mémoire ou CPU."}
+        stats.sort(key=lambda c: (c["memory_bytes"] or 0, c["cpu_percent"] or 0), reverse=True)
+        return {"root": tree.root, "cgroups": stats[:CGROUP_LIMIT], "total": len(stats)}
+
     def get_network_info(self):
+        try:
+            stats = self.network_sampler.sample()
+        except OSError:
+            return self._network_info_from_ip()
+
+        active_interfaces = []
+        for name, data in stats.items():
+            data['ip'] = "N/D"
+            if data['status'] != 'UP':
+                continue
+            ip = _ipv4_address(name)
+            if ip is None:
+                continue
+            data['ip'] = ip
+
+            ssid_info = ""
+            if self.network_sampler.is_wireless(name):
+                ssid = self.network_sampler.ssid_cache.get(name)
+                if ssid:
+                    ssid_info = f" [SSID: {ssid}]"
+
+            rate_info = ""
+            if data['rx_bytes_per_s'] is not None:
+                rate_info = f" ↓ {_format_rate(data['rx_bytes_per_s'])} ↑ {_format_rate(data['tx_bytes_per_s'])}"
+
+            active_interfaces.append(f"{name}{ssid_info} ({ip}){rate_info}")
+
+        return {
+            "status": "Réseau actif" if active_interfaces else "Réseau non actif",
+            "interfaces": active_interfaces,
+            "stats": stats,
+        }
+
+    def _network_info_from_ip(self):
+        """Ancienne méthode par `ip a`, utilisée si /proc/net/dev est illisible."""
         output = _safe_subprocess(["ip", "a"], default_value="N/D")
 
         if "N/D" in output:
@@ -273,122 +2006,203 @@ class SystemCollector:
 
         return {"status": "Réseau actif" if active_interfaces else "Réseau non actif", "interfaces": active_interfaces}
 
-    def get_web_services(self, ports=[80, 443], host='127.0.0.1'):
-        results = {}
-        import socket
+    def get_web_services(self, ports=None, host=SERVICE_HOST):
+        """État des services ; clé = port pour l'hôte local, "hôte:port" sinon.
 
-        for port in ports:
-            status = "Fermé/N/D"
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(0.5)
-                if sock.connect_ex((host, port)) == 0:
-                    status = "Ouvert (Service actif)"
-                sock.close()
-            except Exception:
-                status = "Erreur de socket"
-            results[port] = status
+        Sans `ports`, les cibles configurées dans `service_targets` sont testées.
+        """
+        targets = [(host, port) for port in ports] if ports is not None else self.service_targets
+        results = {}
+        try:
+            probes = probe_services(targets, banner_bytes=self.banner_bytes)
+        except Exception:
+            return {service_key(h, port): "Erreur de socket" for h, port in targets}
+
+        for probe in probes:
+            key = service_key(probe["host"], probe["port"])
+            if probe["open"]:
+                status = f"Ouvert (Service actif, {probe['latency_ms']:.1f} ms)"
+                if probe["banner"]:
+                    status += f" — {probe['banner'][:60]}"
+            else:
+                status = "Fermé/N/D"
+            results[key] = status
         return results
 
 
-# --- Génération du Rapport HTML ---
+# --- Moteur de Gabarit HTML ---
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.html")
+
+# Section de --sections -> id du titre qui marque la balise <section> correspondante
+SECTION_MARKERS = {
+    'general': 'titre_general',
+    'memory': 'titre_memoire',
+    'hardware': 'titre_materiel',
+    'process': 'titre_processus',
+    'disk': 'titre_disques',
+    'network': 'titre_reseau',
+    'cgroup': 'titre_cgroups',
+    'profile': 'titre_profil',
+}
+
+_TEMPLATE_TOKEN = re.compile(r'\{\{(\w+)\}\}|[ \t]*<section aria-labelledby="(titre_\w+)"|(</section>[ \t]*\n?)')
+_SECTION_BY_MARKER = {marker: name for name, marker in SECTION_MARKERS.items()}
+_TEMPLATE_CACHE = {}
+
+
+class CompiledTemplate:
+    """Gabarit découpé une seule fois en segments littéraux et emplacements.
+
+    `parts` alterne littéraux (indices pairs) et noms d'emplacements (indices
+    impairs) ; le rendu est une seule jointure. Chaque bloc
+    `<section aria-labelledby="titre_...">` est délimité par deux
+    emplacements, `section:<nom>` et `/section:<nom>`, dont le texte d'origine
+    est gardé dans `markup` : une section non demandée est omise du document.
+    """
+
+    def __init__(self, text):
+        self.parts = []
+        self.markup = {}
+        open_section = None
+        position = 0
+        for match in _TEMPLATE_TOKEN.finditer(text):
+            if match.group(3) and open_section is None:
+                continue
+            self.parts.append(text[position:match.start()])
+            if match.group(1):
+                self.parts.append(match.group(1))
+            elif match.group(2):
+                open_section = _SECTION_BY_MARKER.get(match.group(2), match.group(2))
+                self.parts.append(f"section:{open_section}")
+                self.markup[len(self.parts) - 1] = match.group(0)
+            else:
+                self.parts.append(f"/section:{open_section}")
+                self.markup[len(self.parts) - 1] = match.group(0)
+                open_section = None
+            position = match.end()
+        self.parts.append(text[position:])
+
+    def render(self, values, sections=None):
+        """Produit le document ; les emplacements inconnus sont laissés tels quels."""
+        output = []
+        skipping = False
+        for i, part in enumerate(self.parts):
+            if not i % 2:
+                if not skipping:
+                    output.append(part)
+            elif part.startswith("section:"):
+                skipping = sections is not None and part[8:] not in sections
+                if not skipping:
+                    output.append(self.markup[i])
+            elif part.startswith("/section:"):
+                if not skipping:
+                    output.append(self.markup[i])
+                skipping = False
+            elif not skipping:
+                output.append(values.get(part, f"{{{{{part}}}}}"))
+        return "".join(output)
+
+
+def load_template(path=TEMPLATE_PATH):
+    """Renvoie le gabarit compilé, recompilé seulement si le fichier a changé (mtime)."""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        template = CompiledTemplate(f.read())
+    _TEMPLATE_CACHE[path] = (mtime, template)
+    return template
 
-def generate_html_report(destination_file, sections=['all']):
-    collector = SystemCollector()
-    script_dir = Path(sys.argv[0]).parent.resolve()
-    html_template_path = script_dir / "index.html"
 
-    try:
-        with open(html_template_path, "r", encoding="utf-8") as f:
-            html_template = f.read()
-    except FileNotFoundError:
-        print(f"Erreur: Le modèle HTML est introuvable à {html_template_path}.")
-        sys.exit(1)
+# --- Génération du Rapport HTML ---
 
-    data = {
-        "general": collector.get_general_info(),
-        "memory": collector.get_memory_stats(),
-        "temps": collector.get_temperatures(),
-        "power": collector.get_power_supply(),
-        "processes": collector.get_process_list(),
-        "disks": collector.get_disk_usage(),
-        "network": collector.get_network_info(),
-        "web_services": collector.get_web_services(),
+def _process_memory_cell(process):
+    if "pss" not in process:
+        return process['mem_percent']
+    return f"{process['mem_percent']} (PSS {process['pss']}, USS {process['uss']}, swap {process['swap']})"
+
+
+def _cgroup_memory_cell(cgroup):
+    """Mémoire d'un cgroup, avec la limite memory.max et le taux d'occupation s'il y en a une."""
+    if cgroup['memory_bytes'] is None:
+        return "N/D"
+    used = _human_size(cgroup['memory_bytes'])
+    limit = cgroup['memory_max_bytes']
+    if not limit:
+        return used
+    percent = cgroup['memory_bytes'] / limit * 100
+    percent_class = "etat-critique" if percent > 90 else "etat-avertissement" if percent > 70 else "etat-ok"
+    return f'<span class="{percent_class}">{used} / {_human_size(limit)} ({percent:.0f}%)</span>'
+
+
+def build_report_values(data):
+    """Calcule la valeur de chaque emplacement {{...}} du gabarit à partir des données collectées."""
+    # Seules les sections collectées sont calculées ; l'en-tête (date) et le
+    # titre des services (nom d'hôte) restent disponibles sans la section générale
+    general = data.get('general') or {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "hostname": socket.gethostname()}
+    values = {
+        'DATE_TEMPS': general['time'],
+        'HOSTNAME': general['hostname'],
     }
+    if 'general' in data:
+        values['KERNEL_VERSION'] = general['kernel']
+        values['UPTIME'] = general['uptime']
+
+    if 'memory' in data:
+        mem = data['memory']
+        values.update({
+            'MEMOIRE_USE_PCT': str(mem['used_percent']),
+            'MEMOIRE_TOTALE_GO': f"{mem['total_gb']} GO",
+            'MEMOIRE_USE_PCT_VAL': str(mem['used_percent']),
+            'MEMOIRE_CACHE_GO': f"{mem['cache_gb']} GO",
+            'SWAP_USE_PCT': str(mem['swap_used_percent']),
+            'SWAP_TOTALE_GO': f"{mem['swap_total_gb']} GO",
+            'SWAP_USE_PCT_VAL': str(mem['swap_used_percent']),
+        })
+
+    if 'temps' in data:
+        if "Erreur" in data['temps']:
+            values['LISTE_TEMPERATURES'] = f'<li class="message-erreur">{data["temps"]["Erreur"]}</li>'
+        else:
+            values['LISTE_TEMPERATURES'] = "".join(
+                f'<li>{name}: <span class="valeur_temp">{temp}</span></li>' for name, temp in data['temps'].items())
 
-    html_content = html_template
-
-    section_markers = {
-        'general': 'aria-labelledby="titre_general"',
-        'memory': 'aria-labelledby="titre_memoire"',
-        'hardware': 'aria-labelledby="titre_materiel"',
-        'process': 'aria-labelledby="titre_processus"',
-        'disk': 'aria-labelledby="titre_disques"',
-        'network': 'aria-labelledby="titre_reseau"'
-    }
+    if 'power' in data:
+        power = data['power']
+        values['STATUT_ALIMENTATION'] = f"{power['status']} ({power['source']})"
+        values['NIVEAU_BATTERIE'] = power['capacity']
 
-    for section_name, marker in section_markers.items():
-        if section_name not in sections:
-            html_content = html_content.replace(marker, f'{marker} style="display:none !important;"')
-
-    # Remplacements
-    html_content = html_content.replace('{{DATE_TEMPS}}', data['general']['time'])
-    html_content = html_content.replace('{{HOSTNAME}}', data['general']['hostname'])
-    html_content = html_content.replace('{{KERNEL_VERSION}}', data['general']['kernel'])
-    html_content = html_content.replace('{{UPTIME}}', data['general']['uptime'])
-
-    mem = data['memory']
-    html_content = html_content.replace('{{MEMOIRE_USE_PCT}}', str(mem['used_percent']))
-    html_content = html_content.replace('{{MEMOIRE_TOTALE_GO}}', f"{mem['total_gb']} GO")
-    html_content = html_content.replace('{{MEMOIRE_USE_PCT_VAL}}', str(mem['used_percent']))
-    html_content = html_content.replace('{{MEMOIRE_CACHE_GO}}', f"{mem['cache_gb']} GO")
-    html_content = html_content.replace('{{SWAP_USE_PCT}}', str(mem['swap_used_percent']))
-    html_content = html_content.replace('{{SWAP_TOTALE_GO}}', f"{mem['swap_total_gb']} GO")
-    html_content = html_content.replace('{{SWAP_USE_PCT_VAL}}', str(mem['swap_used_percent']))
-
-    temps_html = ""
-    if "Erreur" in data['temps']:
-        temps_html = f'<li class="message-erreur">{data["temps"]["Erreur"]}</li>'
-    else:
-        for name, temp in data['temps'].items():
-            temps_html += f'<li>{name}: <span class="valeur_temp">{temp}</span></li>'
-    html_content = html_content.replace('{{LISTE_TEMPERATURES}}', temps_html)
-
-    power = data['power']
-    power_status = f"{power['status']} ({power['source']})"
-    power_capacity = power['capacity']
-    html_content = html_content.replace('{{STATUT_ALIMENTATION}}', power_status)
-    html_content = html_content.replace('{{NIVEAU_BATTERIE}}', power_capacity)
-
-    process_rows = ""
-    if data['processes']:
-        for p in data['processes']:
-            process_rows += f"""
+    if 'processes' in data:
+        if data['processes']:
+            values['CORPS_TABLEAU_PROCESSUS'] = "".join(f"""
             <tr>
                 <td>{p['pid']}</td>
                 <td>{p['user']}</td>
                 <td>{p['cpu_percent']}</td>
-                <td>{p['mem_percent']}</td>
+                <td>{_process_memory_cell(p)}</td>
                 <td>{p['name']}</td>
             </tr>
-            """
-    else:
-        process_rows = '<tr><td colspan="5" class="message-erreur" style="text-align:center;">Aucun processus actif ou erreur de lecture.</td></tr>'
-    html_content = html_content.replace('{{CORPS_TABLEAU_PROCESSUS}}', process_rows)
-
-    disk_rows = ""
-    if data['disks'] and 'Error' in data['disks'][0]:
-        disk_rows = f'<tr><td colspan="5" class="message-erreur" style="text-align:center;">{data["disks"][0]["Error"]}</td></tr>'
-    elif data['disks']:
-        for d in data['disks']:
-            try:
-                percent_val = int(d['percent'].replace('%', '').replace('N/A', '0'))
-            except ValueError:
-                percent_val = 0
+            """ for p in data['processes'])
+        else:
+            values['CORPS_TABLEAU_PROCESSUS'] = '<tr><td colspan="5" class="message-erreur" style="text-align:center;">Aucun processus actif ou erreur de lecture.</td></tr>'
+
+    if 'disks' in data:
+        if data['disks'] and 'Error' in data['disks'][0]:
+            values['CORPS_TABLEAU_DISQUES'] = f'<tr><td colspan="5" class="message-erreur" style="text-align:center;">{data["disks"][0]["Error"]}</td></tr>'
+        elif data['disks']:
+            disk_rows = []
+            for d in data['disks']:
+                try:
+                    percent_val = int(d['percent'].replace('%', '').replace('N/A', '0'))
+                except ValueError:
+                    percent_val = 0
 
-            percent_class = "etat-critique" if percent_val > 90 else "etat-avertissement" if percent_val > 70 else "etat-ok"
+                percent_class = "etat-critique" if percent_val > 90 else "etat-avertissement" if percent_val > 70 else "etat-ok"
 
-            disk_rows += f"""
+                disk_rows.append(f"""
             <tr>
                 <td>{d['target']} ({d['fstype']})</td>
                 <td>{d['size']}</td>
@@ -396,35 +2210,423 @@ def generate_html_report(destination_file, sections=['all']):
                 <td>{d['available']}</td>
                 <td class="{percent_class}">{d['percent']}</td>
             </tr>
+            """)
+            values['CORPS_TABLEAU_DISQUES'] = "".join(disk_rows)
+        else:
+            values['CORPS_TABLEAU_DISQUES'] = '<tr><td colspan="5" class="message-erreur" style="text-align:center;">Aucun disque détecté.</td></tr>'
+
+    if 'disk_io' in data:
+        disk_io = data['disk_io']
+        if "Erreur" in disk_io:
+            values['CORPS_TABLEAU_DISQUES_IO'] = f'<tr><td colspan="6" class="message-erreur" style="text-align:center;">{disk_io["Erreur"]}</td></tr>'
+        else:
+            values['CORPS_TABLEAU_DISQUES_IO'] = "".join(f"""
+            <tr>
+                <td>{name}</td>
+                <td>{io['read_iops']:.1f} / {io['write_iops']:.1f}</td>
+                <td>{_format_rate(io['read_bytes_per_s'])}</td>
+                <td>{_format_rate(io['write_bytes_per_s'])}</td>
+                <td>{io['await_ms']:.2f} ms</td>
+                <td>{io['util_percent']:.1f}%</td>
+            </tr>
+            """ for name, io in disk_io.items())
+
+    if 'network' in data:
+        network_list = "".join([f'<li>{i}</li>' for i in data['network']['interfaces']])
+        if not network_list:
+            network_list = f'<li class="message-erreur">{data["network"]["status"]}</li>'
+
+        values['STATUT_RESEAU'] = data['network']['status']
+        values['LISTE_INTERFACES'] = network_list
+
+    if 'web_services' in data:
+        services = []
+        for target, status in data['web_services'].items():
+            label = f"Port {target} ({PORT_LABELS[target]})" if target in PORT_LABELS else f"Port {target}"
+            services.append(f'<li>{label}: <span id="statut_port_{str(target).replace(":", "_")}">{html.escape(status)}</span></li>')
+        values['LISTE_SERVICES_WEB'] = "".join(services)
+
+    if 'cgroups' in data:
+        cgroups = data['cgroups']
+        if "Erreur" in cgroups:
+            values['CORPS_TABLEAU_CGROUPS'] = f'<tr><td colspan="5" class="message-erreur" style="text-align:center;">{html.escape(cgroups["Erreur"])}</td></tr>'
+        else:
+            values['CORPS_TABLEAU_CGROUPS'] = "".join(f"""
+            <tr>
+                <td>{html.escape(c['path'])}</td>
+                <td>{_cgroup_memory_cell(c)}</td>
+                <td>{"N/D" if c['cpu_percent'] is None else f"{c['cpu_percent']:.1f}%"}</td>
+                <td>{"N/D" if c['io_read_bytes_per_s'] is None else f"{_format_rate(c['io_read_bytes_per_s'])} / {_format_rate(c['io_write_bytes_per_s'])}"}</td>
+                <td>{c['processes']}</td>
+            </tr>
+            """ for c in cgroups['cgroups'])
+    return values
+
+
+def build_profile_rows():
+    """Lignes du tableau d'instrumentation (section « profile » du rapport)."""
+    rows = "".join(f"""
+            <tr>
+                <td>{name}</td>
+                <td>{calls}</td>
+                <td>{wall:.2f} ms</td>
+                <td>{cpu:.2f} ms</td>
+                <td>{subprocesses}</td>
+                <td>{errors}</td>
+            </tr>
+            """ for name, calls, wall, cpu, subprocesses, errors in PROFILER.rows())
+    if not rows:
+        return '<tr><td colspan="6" class="message-erreur" style="text-align:center;">Instrumentation désactivée (option --profile).</td></tr>'
+    overhead = PROFILER.overhead()
+    return rows + f"""
+            <tr>
+                <td><strong>Coût du moniteur</strong></td>
+                <td colspan="5">{overhead['cpu_s'] * 1000:.0f} ms CPU, pic RSS {overhead['max_rss_mb']:.1f} Mo, {overhead['threads']} threads actifs</td>
+            </tr>
             """
-    else:
-        disk_rows = '<tr><td colspan="5" class="message-erreur" style="text-align:center;">Aucun disque détecté.</td></tr>'
-    html_content = html_content.replace('{{CORPS_TABLEAU_DISQUES}}', disk_rows)
 
-    network_list = "".join([f'<li>{i}</li>' for i in data['network']['interfaces']])
-    if not network_list:
-        network_list = f'<li class="message-erreur">{data["network"]["status"]}</li>'
 
-    html_content = html_content.replace('{{STATUT_RESEAU}}', data['network']['status'])
-    html_content = html_content.replace('{{LISTE_INTERFACES}}', network_list)
-    html_content = html_content.replace('{{STATUT_PORT_80}}', data['web_services'][80])
-    html_content = html_content.replace('{{STATUT_PORT_443}}', data['web_services'][443])
+def render_html_report(data, sections, template_path=TEMPLATE_PATH):
+    """Rend le rapport HTML complet à partir des données collectées."""
+    with PROFILER.measure("rendu.gabarit"):
+        template = load_template(template_path)
+    with PROFILER.measure("rendu.valeurs"):
+        values = build_report_values(data)
+    if 'profile' in sections:
+        # Calculé en dernier pour inclure la collecte et la préparation des valeurs
+        values['CORPS_TABLEAU_PROFIL'] = build_profile_rows()
+    with PROFILER.measure("rendu.jointure"):
+        return template.render(values, sections)
+
+
+def collect_report_data(collector, sections=REPORT_SECTIONS):
+    """Collecte en parallèle les sections du rapport demandées, et seulement elles."""
+    return REGISTRY.collect(sections, collector, names=SYSTEM_COLLECTORS)
+
+
+def collect_snapshot(collector):
+    """Collecte en parallèle toutes les sections (rapport + usage CPU)."""
+    return REGISTRY.collect(None, collector, names=SYSTEM_COLLECTORS)
+
+
+def generate_html_report(destination_file, sections=['all'], collector=None):
+    collector = collector or SystemCollector()
 
     try:
-        with open(destination_file, "w", encoding="utf-8") as f:
+        load_template()
+    except FileNotFoundError:
+        print(f"Erreur: Le modèle HTML est introuvable à {TEMPLATE_PATH}.")
+        sys.exit(1)
+
+    data, incomplete = collect_report_data(collector, sections)
+    html_content = render_html_report(data, sections)
+
+    try:
+        with PROFILER.measure("rendu.ecriture"), open(destination_file, "w", encoding="utf-8") as f:
             f.write(html_content)
         print(f"Rapport HTML généré avec succès : {destination_file}")
         if 'all' not in sections:
             print(f"Sections incluses : {', '.join(sections)}")
+        if incomplete:
+            print(f"Sections incomplètes ({TIMEOUT_MARKER} ou erreur) : {', '.join(incomplete)}")
+        if PROFILER.enabled:
+            print(PROFILER.format_text())
     except IOError:
         print(f"Erreur d'écriture: Impossible d'écrire le fichier de rapport à {destination_file}.")
         sys.exit(1)
 
 
+# --- Mode Démon et Historique ---
+
+DAEMON_INTERVAL = 5.0
+HISTORY_CAPACITY = 720
+
+
+class MetricRing:
+    """Tampon circulaire de flottants de taille fixe, adossé à un `array('d')`.
+
+    La mémoire est allouée une fois pour toutes : le démon peut tourner
+    indéfiniment sans que l'historique grossisse. Une valeur absente est
+    stockée comme NaN.
+    """
+    __slots__ = ("capacity", "count", "_next", "_buffer", "_view")
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self._buffer = array('d', bytes(8 * capacity))
+        self._view = memoryview(self._buffer)
+
+    def append(self, value):
+        self._buffer[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self):
+        return self._buffer[self._next - 1] if self.count else math.nan
+
+    def values(self):
+        """Valeurs dans l'ordre chronologique (de la plus ancienne à la plus récente)."""
+        if self.count < self.capacity:
+            return self._view[:self.count].tolist()
+        return self._view[self._next:].tolist() + self._view[:self._next].tolist()
+
+
+def _to_float(value):
+    """Extrait un nombre de valeurs comme 42.5, "42.5°C" ou "87%" (NaN sinon)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r'\s*(-?\d+(?:\.\d+)?)', str(value))
+    return float(match.group(1)) if match else math.nan
+
+
+def snapshot_metrics(snapshot):
+    """Aplatit les valeurs numériques d'un instantané en {nom_de_métrique: flottant}."""
+    metrics = {}
+    mem = snapshot.get("memory", {})
+    for key in ("used_percent", "used_gb", "cache_gb", "swap_used_percent"):
+        if key in mem:
+            metrics[f"memory.{key}"] = _to_float(mem[key])
+
+    cpu = snapshot.get("cpu", {})
+    if "total" in cpu:
+        metrics["cpu.total"] = _to_float(cpu["total"])
+    for core, value in cpu.get("cores", {}).items():
+        metrics[f"cpu.{core}"] = _to_float(value)
+
+    temps = snapshot.get("temps", {})
+    if "Erreur" not in temps:
+        for name, value in temps.items():
+            metrics[f"temps.{name}"] = _to_float(value)
+
+    for name, stats in snapshot.get("network", {}).get("stats", {}).items():
+        for key in ("rx_bytes_per_s", "tx_bytes_per_s", "rx_packets_per_s", "tx_packets_per_s"):
+            if stats.get(key) is not None:
+                metrics[f"network.{name}.{key}"] = float(stats[key])
+
+    disk_io = snapshot.get("disk_io", {})
+    if "Erreur" not in disk_io:
+        for name, stats in disk_io.items():
+            for key, value in stats.items():
+                metrics[f"disk_io.{name}.{key}"] = float(value)
+
+    for disk in snapshot.get("disks", []):
+        if "target" in disk:
+            metrics[f"disks.{disk['target']}.used_percent"] = _to_float(disk["percent"])
+
+    for target, status in snapshot.get("web_services", {}).items():
+        # Ouvert = 1, fermé = 0 ; erreur de sonde ou délai dépassé = inconnu
+        status = str(status)
+        metrics[f"services.{target}.open"] = (1.0 if status.startswith("Ouvert")
+                                              else 0.0 if status.startswith("Fermé") else math.nan)
+
+    for group in snapshot.get("cgroups", {}).get("cgroups", []):
+        path = group["path"].strip("/") or "/"
+        if group["memory_bytes"] is not None:
+            metrics[f"cgroups.{path}.memory_bytes"] = float(group["memory_bytes"])
+            if group["memory_max_bytes"]:
+                metrics[f"cgroups.{path}.memory_max_percent"] = group["memory_bytes"] / group["memory_max_bytes"] * 100
+        if group["cpu_percent"] is not None:
+            metrics[f"cgroups.{path}.cpu_percent"] = group["cpu_percent"]
+
+    if "capacity" in snapshot.get("power", {}):
+        metrics["power.capacity"] = _to_float(snapshot["power"]["capacity"])
+    return metrics
+
+
+class CollectorDaemon(threading.Thread):
+    """Collecteur persistant : échantillonne à intervalle fixe et historise chaque métrique.
+
+    Le dernier instantané complet reste disponible via `latest_snapshot()`
+    pour le rapport, l'interface graphique ou d'autres lecteurs, qui n'ont
+    alors plus besoin de relancer une collecte.
+    """
+
+    def __init__(self, interval=DAEMON_INTERVAL, capacity=HISTORY_CAPACITY, on_sample=None, collector=None):
+        super().__init__(name="collecte-demon", daemon=True)
+        self.collector = collector or SystemCollector()
+        self.interval = interval
+        self.capacity = capacity
+        self.on_sample = on_sample
+        self.timestamps = MetricRing(capacity)
+        self.history = {}
+        # Nombre de tours consécutifs sans valeur, par métrique
+        self._missing = {}
+        self._lock = threading.Lock()
+        self._latest = None
+        self._incomplete = []
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+
+    def sample_once(self):
+        snapshot, incomplete = collect_snapshot(self.collector)
+        metrics = snapshot_metrics(snapshot)
+
+        with self._lock:
+            missing = self._missing
+            # Une métrique absente à ce tour reçoit NaN pour garder les séries alignées
+            for name in self.history.keys() - metrics.keys():
+                self.history[name].append(math.nan)
+                missing[name] = missing.get(name, 0) + 1
+            for name, value in metrics.items():
+                ring = self.history.get(name)
+                if ring is None:
+                    ring = self.history[name] = MetricRing(self.capacity)
+                    for _ in range(self.timestamps.count):
+                        ring.append(math.nan)
+                ring.append(value)
+                if value == value:
+                    missing.pop(name, None)
+                else:
+                    missing[name] = missing.get(name, 0) + 1
+            # Interfaces, disques, services ou cgroups disparus : une série entièrement
+            # NaN sur toute la fenêtre est libérée, la mémoire reste bornée
+            for name in [name for name, count in missing.items() if count >= self.capacity]:
+                del self.history[name]
+                del missing[name]
+            self.timestamps.append(time.time())
+            self._latest = snapshot
+            self._incomplete = incomplete
+        self._ready.set()
+
+        if self.on_sample is not None:
+            self.on_sample(snapshot, incomplete)
+        return snapshot
+
+    def latest_snapshot(self, wait=True):
+        """Dernier instantané collecté (attend le premier si `wait`)."""
+        if wait:
+            self._ready.wait()
+        with self._lock:
+            return self._latest
+
+    def series(self, name):
+        """Renvoie `(horodatages, valeurs)` pour une métrique de l'historique."""
+        with self._lock:
+            ring = self.history.get(name)
+            return self.timestamps.values(), ring.values() if ring is not None else []
+
+    def latest_values(self):
+        """Dernière valeur de chaque métrique historisée."""
+        with self._lock:
+            return {name: ring.latest() for name, ring in self.history.items()}
+
+    def run(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"Erreur collecte démon: {e}")
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def run_daemon(destination_file, sections, interval=DAEMON_INTERVAL, capacity=HISTORY_CAPACITY, alerts=None,
+               collector=None):
+    """Boucle du mode --daemon : réécrit le rapport à chaque échantillon, sans recollecter.
+
+    `alerts` (un AlertEngine) est évalué sur chaque échantillon.
+    """
+
+    def write_report(snapshot, incomplete):
+        try:
+            html_content = render_html_report(snapshot, sections)
+            with open(destination_file, "w", encoding="utf-8") as f:
+                f.write(html_content)
+        except (IOError, OSError) as e:
+            print(f"Erreur d'écriture du rapport ({destination_file}): {e}")
+        if alerts is not None:
+            alerts.on_sample(snapshot, incomplete)
+
+    daemon = CollectorDaemon(interval, capacity, on_sample=write_report, collector=collector)
+    print(f"Mode démon : échantillonnage toutes les {interval}s, historique de {capacity} points.")
+    daemon.start()
+    try:
+        while daemon.is_alive():
+            daemon.join(1.0)
+    except KeyboardInterrupt:
+        daemon.stop()
+        print("Arrêt du mode démon.")
+
+
 # --- Interface Graphique ---
 
-def interface_graphique():
-    collector = SystemCollector()
+def _set_if_changed(var, value):
+    """Met à jour une StringVar uniquement si sa valeur change (évite un redessin)."""
+    if var.get() != value:
+        var.set(value)
+
+
+GUI_REFRESH_INTERVAL = 1.5
+GUI_POLL_MS = 100
+# Collecteurs affichés par l'interface (pas de table des disques, de sonde de ports ni de cgroups)
+GUI_COLLECTORS = ("general", "memory", "cpu", "temps", "power", "network", "disk_io", "processes")
+
+
+class CollectorWorker(threading.Thread):
+    """Collecte les métriques en arrière-plan et publie des instantanés dans une file.
+
+    La file ne garde que le dernier instantané : si l'interface prend du
+    retard, elle saute directement à l'état le plus récent.
+    """
+
+    def __init__(self, collector, interval=GUI_REFRESH_INTERVAL, source=None):
+        super().__init__(name="collecte-gui", daemon=True)
+        self.collector = collector
+        # Si un CollectorDaemon est fourni, on lit son dernier instantané au lieu de collecter
+        self.source = source
+        self.interval = interval
+        self.snapshots = queue.Queue(maxsize=1)
+        self._stop_event = threading.Event()
+
+    def collect_snapshot(self):
+        if self.source is not None:
+            # L'instantané du démon couvre toutes les sections : on ne garde que celles affichées
+            snapshot = self.source.latest_snapshot()
+            return {name: snapshot[name] for name in GUI_COLLECTORS if name in snapshot}
+
+        data, _ = REGISTRY.collect(None, self.collector, names=GUI_COLLECTORS)
+        return data
+
+    def run(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            snapshot = self.collect_snapshot()
+            try:
+                self.snapshots.get_nowait()
+            except queue.Empty:
+                pass
+            self.snapshots.put_nowait(snapshot)
+
+            # Cadence fixe : l'intervalle part du début de la collecte précédente
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def interface_graphique(daemon=None, collector=None):
+    import tkinter as tk
+    from tkinter import ttk
+
+    if daemon is not None:
+        collector = daemon.collector
+    collector = collector or SystemCollector()
     fenetre = tk.Tk()
     fenetre.title("Surveillance Système (Temps Réel)")
     fenetre.geometry("850x650")
@@ -434,9 +2636,11 @@ def interface_graphique():
     v_kernel = tk.StringVar(value="--")
     v_uptime = tk.StringVar(value="--")
     v_ram = tk.StringVar(value="--")
+    v_cpu = tk.StringVar(value="--")
     v_temp = tk.StringVar(value="--")
     v_batterie = tk.StringVar(value="--")
     v_reseau = tk.StringVar(value="--")
+    v_disques = tk.StringVar(value="--")
 
     cadre = ttk.Frame(fenetre, padding=12)
     cadre.pack(fill=tk.BOTH, expand=True)
@@ -444,7 +2648,9 @@ def interface_graphique():
     labels_info = [
         ("Heure :", v_heure), ("Nom d'hôte :", v_hote), ("Noyau :", v_kernel),
         ("Uptime :", v_uptime), ("RAM (Usage/Cache/Swap) :", v_ram),
-        ("Températures :", v_temp), ("Alimentation :", v_batterie), ("Réseau (Status/IP) :", v_reseau)
+        ("CPU (Total/Cœurs) :", v_cpu),
+        ("Températures :", v_temp), ("Alimentation :", v_batterie), ("Réseau (Status/IP) :", v_reseau),
+        ("Disques (E/S) :", v_disques)
     ]
 
     for i, (text, var) in enumerate(labels_info):
@@ -454,49 +2660,170 @@ def interface_graphique():
     ttk.Label(cadre, text="Top 30 Processus (par Mémoire) :", font=("Segoe UI", 11, "bold")).grid(row=len(labels_info),
                                                                                                   column=0, sticky="nw",
                                                                                                   pady=10)
-    zone_processus = tk.Text(cadre, width=80, height=16)
-    zone_processus.grid(row=len(labels_info), column=1, sticky="w", pady=10)
+    colonnes = (("pid", "PID", 70), ("user", "USER", 110), ("cpu", "CPU", 70), ("mem", "MEM", 70), ("name", "NOM", 260))
+    arbre_processus = ttk.Treeview(cadre, columns=[c[0] for c in colonnes], show="headings", height=16)
+    for cle, titre, largeur in colonnes:
+        arbre_processus.heading(cle, text=titre)
+        arbre_processus.column(cle, width=largeur, anchor="w", stretch=(cle == "name"))
+    arbre_processus.grid(row=len(labels_info), column=1, sticky="w", pady=10)
+
+    # Lignes actuellement affichées (pid -> valeurs) et leur ordre, pour ne toucher qu'aux différences
+    lignes_affichees = {}
+    ordre_affiche = []
+
+    def afficher_general(info):
+        _set_if_changed(v_heure, info["time"])
+        _set_if_changed(v_hote, info["hostname"])
+        _set_if_changed(v_kernel, info["kernel"])
+        _set_if_changed(v_uptime, info["uptime"])
+
+    def afficher_memoire(mem):
+        _set_if_changed(v_ram,
+            f"Utilisé: {mem['used_gb']} Go ({mem['used_percent']}%) | Cache: {mem['cache_gb']} Go | Swap: {mem['swap_used_percent']}%")
+
+    def afficher_cpu(cpu):
+        if "cores" not in cpu:
+            _set_if_changed(v_cpu, cpu.get("Erreur", "N/D"))
+            return
+        cores_str = " ".join(f"{v:.0f}%" for v in cpu['cores'].values())
+        _set_if_changed(v_cpu, f"{cpu['total']}% | {cores_str}" if cpu['cores'] else "Mesure en cours...")
+
+    def afficher_temperatures(temps):
+        temp_str = temps['Erreur'] if "Erreur" in temps else ", ".join([f"{k}: {v}" for k, v in temps.items()])
+        _set_if_changed(v_temp, temp_str)
+
+    def afficher_alimentation(power):
+        _set_if_changed(v_batterie, f"{power['capacity']} — {power['status']} ({power['source']})")
+
+    def afficher_reseau(net):
+        _set_if_changed(v_reseau,
+            f"{net['status']} | Interfaces: {', '.join(net['interfaces']) if net['interfaces'] else 'N/D'}")
+
+    def afficher_disques(disk_io):
+        if "Erreur" in disk_io:
+            _set_if_changed(v_disques, disk_io["Erreur"])
+            return
+        _set_if_changed(v_disques, " | ".join(
+            f"{name}: L {_format_rate(io['read_bytes_per_s'])} E {_format_rate(io['write_bytes_per_s'])} "
+            f"({io['util_percent']:.0f}%)" for name, io in disk_io.items()))
+
+    def afficher_processus(processes):
+        nouvelles = {p['pid']: (p['pid'], p['user'], p['cpu_percent'], p['mem_percent'], p['name']) for p in processes}
+
+        for iid in [iid for iid in ordre_affiche if iid not in nouvelles]:
+            arbre_processus.delete(iid)
+            ordre_affiche.remove(iid)
+            del lignes_affichees[iid]
+
+        for index, (iid, valeurs) in enumerate(nouvelles.items()):
+            if iid not in lignes_affichees:
+                arbre_processus.insert("", index, iid=iid, values=valeurs)
+                ordre_affiche.insert(index, iid)
+            else:
+                if lignes_affichees[iid] != valeurs:
+                    arbre_processus.item(iid, values=valeurs)
+                if ordre_affiche[index] != iid:
+                    arbre_processus.move(iid, "", index)
+                    ordre_affiche.remove(iid)
+                    ordre_affiche.insert(index, iid)
+            lignes_affichees[iid] = valeurs
+
+    afficheurs = {
+        "general": afficher_general,
+        "memory": afficher_memoire,
+        "cpu": afficher_cpu,
+        "temps": afficher_temperatures,
+        "power": afficher_alimentation,
+        "network": afficher_reseau,
+        "disk_io": afficher_disques,
+        "processes": afficher_processus,
+    }
+    dernier_etat = {}
+
+    worker = CollectorWorker(collector, source=daemon)
 
     def mise_a_jour():
+        # Le thread Tk ne fait qu'appliquer les sections qui ont changé
         try:
-            info = collector.get_general_info()
-            v_heure.set(info["time"]);
-            v_hote.set(info["hostname"]);
-            v_kernel.set(info["kernel"]);
-            v_uptime.set(info["uptime"])
+            snapshot = worker.snapshots.get_nowait()
+        except queue.Empty:
+            snapshot = {}
 
-            mem = collector.get_memory_stats()
-            v_ram.set(
-                f"Utilisé: {mem['used_gb']} Go ({mem['used_percent']}%) | Cache: {mem['cache_gb']} Go | Swap: {mem['swap_used_percent']}%")
+        for section, valeur in snapshot.items():
+            afficheur = afficheurs.get(section)
+            if afficheur is None or dernier_etat.get(section) == valeur:
+                continue
+            try:
+                afficheur(valeur)
+                dernier_etat[section] = valeur
+            except Exception as e:
+                print(f"Erreur maj GUI ({section}): {e}")
 
-            temps = collector.get_temperatures()
-            temp_str = temps['Erreur'] if "Erreur" in temps else ", ".join([f"{k}: {v}" for k, v in temps.items()])
-            v_temp.set(temp_str)
+        fenetre.after(GUI_POLL_MS, mise_a_jour)
 
-            power = collector.get_power_supply()
-            v_batterie.set(f"{power['capacity']} — {power['status']} ({power['source']})")
+    def fermer():
+        worker.stop()
+        fenetre.destroy()
 
-            net = collector.get_network_info()
-            v_reseau.set(
-                f"{net['status']} | Interfaces: {', '.join(net['interfaces']) if net['interfaces'] else 'N/D'}")
+    fenetre.protocol("WM_DELETE_WINDOW", fermer)
+    worker.start()
+    mise_a_jour()
+    fenetre.mainloop()
 
-            processes = collector.get_process_list()
-            zone_processus.delete("1.0", tk.END)
 
-            zone_processus.insert(tk.END, f"{'PID':<6} | {'USER':<10} | {'CPU':<6} | {'MEM':<6} | {'NOM'}\n")
-            zone_processus.insert(tk.END, "-" * 75 + "\n")
+# --- Budget de Démarrage ---
 
-            for p in processes:
-                zone_processus.insert(tk.END,
-                                      f"{p['pid']:<6} | {p['user'][:10]:<10} | {p['cpu_percent']:<6} | {p['mem_percent']:<6} | {p['name']}\n")
+# Temps d'import cumulé maximal (ms) de stat_reporter sur le chemin rapport sans GUI
+STARTUP_BUDGET_MS = 40.0
+# Modules qui ne doivent jamais être chargés par un simple `import stat_reporter`
+STARTUP_FORBIDDEN_MODULES = ("tkinter", "_tkinter", "concurrent.futures", "logging")
 
-        except Exception as e:
-            print(f"Erreur maj GUI: {e}")
 
-        fenetre.after(1500, mise_a_jour)
+def measure_import_time(runs=3):
+    """Mesure l'import de stat_reporter avec `python -X importtime` dans un interpréteur neuf.
+
+    Renvoie `(meilleur_total_ms, modules)` où `modules` associe chaque module
+    importé à son temps cumulé (ms) lors du meilleur essai.
+    """
+    import subprocess
+    best_total = None
+    best_modules = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import stat_reporter"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=30,
+        )
+        modules = {}
+        for line in result.stderr.splitlines():
+            match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)', line)
+            if not match:
+                continue
+            if not match.group(2) and match.group(3) != "stat_reporter":
+                # Import de premier niveau de l'interpréteur (site, encodings...) : hors budget
+                modules = {}
+                continue
+            modules[match.group(3)] = int(match.group(1)) / 1000
+        total = modules.get("stat_reporter")
+        if total is not None and (best_total is None or total < best_total):
+            best_total, best_modules = total, modules
+    return best_total, best_modules
 
-    mise_a_jour()
-    fenetre.mainloop()
+
+def check_startup_budget(budget_ms=STARTUP_BUDGET_MS):
+    """Vérifie le budget de démarrage du mode rapport ; renvoie True s'il est respecté."""
+    total, modules = measure_import_time()
+    if total is None:
+        print("Erreur: impossible de mesurer le temps d'import de stat_reporter.")
+        return False
+
+    forbidden = [m for m in STARTUP_FORBIDDEN_MODULES if m in modules]
+    print(f"Import de stat_reporter : {total:.1f} ms (budget : {budget_ms:.0f} ms)")
+    for name, cumulative in sorted(modules.items(), key=lambda item: -item[1])[1:6]:
+        print(f"  {name:<30} {cumulative:7.1f} ms")
+    if forbidden:
+        print(f"Modules interdits au démarrage : {', '.join(forbidden)}")
+    return total <= budget_ms and not forbidden
 
 
 # --- Fonction Principale ---
@@ -507,20 +2834,155 @@ def main():
     parser.add_argument("--output", default="rapport_etat_systeme.html",
                         help="Nom du fichier de rapport HTML de sortie.")
     parser.add_argument("--sections", nargs='+',
-                        choices=['general', 'memory', 'hardware', 'process', 'disk', 'network'],
+                        choices=list(REPORT_SECTIONS),
                         default=['all'],
-                        help="Sections à inclure : general, memory, hardware, process, disk, network. (Défaut: tout)")
+                        help="Sections à inclure : general, memory, hardware, process, disk, network, cgroup. (Défaut: tout)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Garde un collecteur actif, historise les métriques et réécrit le rapport à chaque échantillon.")
+    parser.add_argument("--interval", type=float, default=DAEMON_INTERVAL,
+                        help=f"Intervalle d'échantillonnage du mode démon en secondes. (Défaut: {DAEMON_INTERVAL})")
+    parser.add_argument("--history", type=int, default=HISTORY_CAPACITY,
+                        help=f"Nombre d'échantillons conservés par métrique. (Défaut: {HISTORY_CAPACITY})")
+    parser.add_argument("--serve", action="store_true",
+                        help="Expose le dernier instantané en HTTP (/metrics, /snapshot.json, rapport sur /).")
+    parser.add_argument("--bind", default="127.0.0.1", help="Adresse d'écoute des modes --serve et --agent. (Défaut: 127.0.0.1)")
+    parser.add_argument("--port", type=int,
+                        help="Port d'écoute du mode --serve (Défaut: 9120) ou --agent (Défaut: 9121).")
+    parser.add_argument("--max-age", type=float, default=5.0,
+                        help="Fraîcheur maximale (s) d'un instantané servi avant nouvelle collecte. (Défaut: 5)")
+    parser.add_argument("--agent", action="store_true",
+                        help="Agent de flotte : sert des instantanés compacts en TCP à un agrégateur (--fleet).")
+    parser.add_argument("--fleet", nargs='+', metavar="[HÔTE:]PORT",
+                        help="Agrège les agents donnés dans un rapport de flotte (--output) ; avec --daemon, toutes les --interval s.")
+    parser.add_argument("--deadline", type=float, default=3.0,
+                        help="Délai maximal (s) accordé à chaque agent par l'agrégateur. (Défaut: 3)")
+    parser.add_argument("--ports", nargs='+', metavar="[HÔTE:]PORT",
+                        help="Services à tester, ex. 80 443 10.0.0.5:22. (Défaut: 80 443 sur 127.0.0.1)")
+    parser.add_argument("--banner", action="store_true",
+                        help="Lit la bannière envoyée par chaque service ouvert (SSH, SMTP...).")
+    parser.add_argument("--export", choices=["jsonl", "csv"],
+                        help="Exporte un enregistrement par échantillon (toutes les --interval s) en JSON Lines ou CSV.")
+    parser.add_argument("--export-file", default="-",
+                        help="Fichier de l'export continu ; '-' pour la sortie standard. (Défaut: -)")
+    parser.add_argument("--count", type=int,
+                        help="Nombre d'échantillons à exporter ou enregistrer avant de s'arrêter. (Défaut: illimité)")
+    parser.add_argument("--rotate-size", type=float, default=64.0,
+                        help="Taille (Mo) au-delà de laquelle le fichier d'export est archivé. (Défaut: 64)")
+    parser.add_argument("--rotate-keep", type=int, default=5,
+                        help="Nombre d'archives conservées par la rotation. (Défaut: 5)")
+    parser.add_argument("--record", metavar="FICHIER",
+                        help="Ajoute un échantillon toutes les --interval s à un historique binaire (voir stat_history.py).")
+    parser.add_argument("--alerts", action="store_true",
+                        help="Évalue les règles d'alerte à chaque échantillon du mode --daemon.")
+    parser.add_argument("--alert-rules", metavar="FICHIER",
+                        help="Règles d'alerte, une par ligne (Défaut: règles intégrées, voir stat_alerts.py).")
+    parser.add_argument("--alert-log", default="-", metavar="FICHIER",
+                        help="Journal des alertes déclenchées et résolues ; '-' pour la sortie standard. (Défaut: -)")
+    parser.add_argument("--alert-hook", metavar="COMMANDE",
+                        help="Commande lancée à chaque événement (variables ALERTE_ETAT, ALERTE_REGLE, ALERTE_METRIQUE, ALERTE_VALEUR).")
+    parser.add_argument("--pss", action="store_true",
+                        help="Classe les processus par PSS (smaps_rollup) et affiche PSS, USS et swap au lieu du RSS.")
+    parser.add_argument("--pss-budget", type=float, default=SMAPS_BUDGET * 1000, metavar="MS",
+                        help=f"Temps maximal de lecture de smaps_rollup par tour, en ms. (Défaut: {SMAPS_BUDGET * 1000:.0f})")
+    parser.add_argument("--profile", action="store_true",
+                        help="Mesure le coût de chaque collecteur et étape de rendu (console et section du rapport).")
+    parser.add_argument("--check-startup", action="store_true",
+                        help=f"Mesure le temps d'import du mode rapport et échoue au-delà de {STARTUP_BUDGET_MS:.0f} ms.")
 
     args = parser.parse_args()
 
-    if args.gui:
-        interface_graphique()
-    else:
-        sections_to_include = args.sections
-        if 'all' in sections_to_include:
-            sections_to_include = ['general', 'memory', 'hardware', 'process', 'disk', 'network']
+    if args.check_startup:
+        sys.exit(0 if check_startup_budget() else 1)
 
-        generate_html_report(args.output, sections_to_include)
+    if args.interval <= 0 or args.history <= 0:
+        parser.error("--interval et --history doivent être strictement positifs.")
+
+    if args.deadline <= 0:
+        parser.error("--deadline doit être strictement positif.")
+    if args.count is not None and args.count <= 0:
+        parser.error("--count doit être strictement positif.")
+    if args.rotate_size <= 0 or args.rotate_keep < 0:
+        parser.error("--rotate-size doit être positif et --rotate-keep ne peut pas être négatif.")
+
+    # Options propres à chaque SystemCollector créé ci-dessous
+    collector_options = {}
+    if args.ports:
+        try:
+            collector_options["service_targets"] = [parse_service_target(target) for target in args.ports]
+        except ValueError as e:
+            parser.error(f"--ports : {e}")
+    if args.banner:
+        collector_options["banner_bytes"] = 256
+    if args.pss:
+        if args.pss_budget <= 0:
+            parser.error("--pss-budget doit être strictement positif.")
+        collector_options["memory_accounting"] = "pss"
+        collector_options["smaps_budget"] = args.pss_budget / 1000
+
+    alerts = None
+    if args.alerts or args.alert_rules or args.alert_hook:
+        if not args.daemon:
+            parser.error("les alertes s'évaluent sur un flux d'échantillons : ajoutez --daemon.")
+        import stat_alerts
+        try:
+            alerts = stat_alerts.load_engine(args.alert_rules, args.alert_log, args.alert_hook)
+        except (OSError, ValueError) as e:
+            parser.error(f"--alert-rules : {e}")
+    on_sample = alerts.on_sample if alerts is not None else None
+
+    sections_to_include = args.sections
+    if 'all' in sections_to_include:
+        sections_to_include = list(REPORT_SECTIONS)
+    if args.profile:
+        PROFILER.enabled = True
+        sections_to_include = sections_to_include + ['profile']
+
+    if args.agent:
+        import stat_fleet
+        stat_fleet.run_agent(args.bind, args.port or stat_fleet.AGENT_PORT, args.max_age,
+                             collector=SystemCollector(**collector_options))
+    elif args.fleet:
+        import stat_fleet
+        try:
+            targets = stat_fleet.parse_fleet_targets(args.fleet)
+        except ValueError as e:
+            parser.error(f"--fleet : {e}")
+        output = args.output if args.output != parser.get_default("output") else "rapport_flotte.html"
+        stat_fleet.run_fleet(targets, output, args.deadline, args.interval if args.daemon else None)
+    elif args.record:
+        import stat_history
+        try:
+            stat_history.run_recorder(args.record, args.interval, args.count,
+                                      collector=SystemCollector(**collector_options))
+        except (OSError, ValueError) as e:
+            print(f"Erreur d'historique ({args.record}): {e}")
+            sys.exit(1)
+    elif args.export:
+        import stat_export
+        stat_export.run_export(args.export, args.export_file, args.interval, args.count,
+                               int(args.rotate_size * 1024 * 1024), args.rotate_keep,
+                               collector=SystemCollector(**collector_options))
+    elif args.serve:
+        import stat_server
+        collector = SystemCollector(**collector_options)
+        daemon = None
+        if args.daemon:
+            daemon = CollectorDaemon(args.interval, args.history, on_sample=on_sample, collector=collector)
+            daemon.start()
+        stat_server.serve(args.bind, args.port or stat_server.SERVER_PORT, args.max_age, source=daemon,
+                          collector=collector)
+    elif args.gui:
+        collector = SystemCollector(**collector_options)
+        daemon = None
+        if args.daemon:
+            daemon = CollectorDaemon(args.interval, args.history, on_sample=on_sample, collector=collector)
+            daemon.start()
+        interface_graphique(daemon, collector)
+    elif args.daemon:
+        run_daemon(args.output, sections_to_include, args.interval, args.history, alerts,
+                   collector=SystemCollector(**collector_options))
+    else:
+        generate_html_report(args.output, sections_to_include, SystemCollector(**collector_options))
 
 
 if __name__ == "__main__":
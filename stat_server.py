@@ -0,0 +1,205 @@
+# stat_server.py
+
+"""Serveur HTTP local exposant le dernier instantané de SystemCollector.
+
+Routes :
+    /              rapport HTML rendu (toutes les sections)
+    /snapshot.json instantané brut en JSON
+    /metrics       format d'exposition texte Prometheus
+    /history.json  historique du démon (--daemon) : liste des métriques et
+                   dernière valeur, ou `?metric=<nom>` pour une série complète
+"""
+
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from stat_reporter import REPORT_SECTIONS, SystemCollector, collect_snapshot, render_html_report, snapshot_metrics
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 9120
+CACHE_MAX_AGE = 5.0
+
+ALL_SECTIONS = list(REPORT_SECTIONS)
+
+
+class SnapshotCache:
+    """Instantané partagé avec une fenêtre de fraîcheur.
+
+    Tant que l'instantané a moins de `max_age` secondes il est renvoyé tel
+    quel ; sinon un seul thread relance la collecte pendant que les autres
+    attendent son résultat. Plusieurs clients simultanés ne provoquent donc
+    qu'une collecte par intervalle.
+    """
+
+    def __init__(self, max_age=CACHE_MAX_AGE, collector=None, source=None):
+        self.max_age = max_age
+        # Un CollectorDaemon peut fournir directement ses instantanés ; le
+        # collecteur (et sa sonde GPU) n'est alors pas construit
+        self.source = source
+        self.collector = collector or (SystemCollector() if source is None else None)
+        self.collections = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._collected_at = -math.inf
+
+    def _collect(self):
+        if self.source is not None:
+            return self.source.latest_snapshot()
+
+        snapshot, _ = collect_snapshot(self.collector)
+        return snapshot
+
+    def get(self):
+        if time.monotonic() - self._collected_at < self.max_age:
+            return self._snapshot
+        with self._lock:
+            # Un autre thread a pu rafraîchir pendant qu'on attendait le verrou
+            if time.monotonic() - self._collected_at >= self.max_age:
+                self._snapshot = self._collect()
+                self._collected_at = time.monotonic()
+                self.collections += 1
+            return self._snapshot
+
+
+def _json_number(value):
+    return None if math.isnan(value) else value
+
+
+def history_payload(source, query):
+    """Contenu de /history.json ; None si la source ne garde pas d'historique."""
+    if not hasattr(source, "series"):
+        return None
+    names = parse_qs(query).get("metric")
+    if not names:
+        return {"metrics": {name: _json_number(value) for name, value in sorted(source.latest_values().items())}}
+    timestamps, values = source.series(names[0])
+    return {"metric": names[0], "timestamps": timestamps, "values": [_json_number(v) for v in values]}
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _prometheus_value(value):
+    return "NaN" if math.isnan(value) else repr(value)
+
+
+def format_prometheus(snapshot):
+    """Convertit un instantané au format d'exposition texte de Prometheus."""
+    metrics = snapshot_metrics(snapshot)
+    lines = []
+
+    def family(name, help_text, samples, metric_type="gauge"):
+        if not samples:
+            return
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_str}}} {_prometheus_value(value)}" if label_str
+                         else f"{name} {_prometheus_value(value)}")
+
+    family("stat_memory_used_percent", "Pourcentage de RAM utilisée.",
+           [({}, metrics["memory.used_percent"])] if "memory.used_percent" in metrics else [])
+    family("stat_memory_used_gigabytes", "RAM utilisée en Go.",
+           [({}, metrics["memory.used_gb"])] if "memory.used_gb" in metrics else [])
+    family("stat_memory_cache_gigabytes", "Cache et buffers en Go.",
+           [({}, metrics["memory.cache_gb"])] if "memory.cache_gb" in metrics else [])
+    family("stat_swap_used_percent", "Pourcentage de swap utilisé.",
+           [({}, metrics["memory.swap_used_percent"])] if "memory.swap_used_percent" in metrics else [])
+    family("stat_cpu_usage_percent", "Usage CPU sur le dernier intervalle (core=\"cpu\" pour le total).",
+           [({"core": "cpu" if name == "cpu.total" else name[4:]}, value)
+            for name, value in metrics.items() if name.startswith("cpu.")])
+    family("stat_temperature_celsius", "Température des capteurs.",
+           [({"sensor": name[6:]}, value) for name, value in metrics.items() if name.startswith("temps.")])
+    network = snapshot.get("network", {}).get("stats", {})
+    family("stat_network_bytes_total", "Octets transférés par interface depuis le démarrage.",
+           [({"interface": name, "direction": direction}, float(stats[f"{direction}_bytes"]))
+            for name, stats in network.items() for direction in ("rx", "tx")], "counter")
+    family("stat_network_bytes_per_second", "Débit par interface sur le dernier intervalle.",
+           [({"interface": name, "direction": direction}, float(stats[f"{direction}_bytes_per_s"]))
+            for name, stats in network.items() for direction in ("rx", "tx")
+            if stats.get(f"{direction}_bytes_per_s") is not None])
+    disk_io = snapshot.get("disk_io", {})
+    if "Erreur" not in disk_io:
+        family("stat_disk_iops", "Opérations d'E/S par seconde.",
+               [({"device": name, "direction": d}, stats[f"{d}_iops"])
+                for name, stats in disk_io.items() for d in ("read", "write")])
+        family("stat_disk_bytes_per_second", "Débit d'E/S disque.",
+               [({"device": name, "direction": d}, stats[f"{d}_bytes_per_s"])
+                for name, stats in disk_io.items() for d in ("read", "write")])
+        family("stat_disk_await_milliseconds", "Temps moyen par requête d'E/S.",
+               [({"device": name}, stats["await_ms"]) for name, stats in disk_io.items()])
+        family("stat_disk_utilization_percent", "Taux d'occupation du disque.",
+               [({"device": name}, stats["util_percent"]) for name, stats in disk_io.items()])
+    family("stat_battery_capacity_percent", "Niveau de charge de la batterie.",
+           [({}, metrics["power.capacity"])] if "power.capacity" in metrics else [])
+    family("stat_port_open", "1 si le port local accepte les connexions.",
+           [({"port": port}, 1.0 if str(status).startswith("Ouvert") else 0.0)
+            for port, status in snapshot.get("web_services", {}).items()])
+    return "\n".join(lines) + "\n"
+
+
+class StatRequestHandler(BaseHTTPRequestHandler):
+    server_version = "StatReporter/1.0"
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        cache = self.server.cache
+        try:
+            if path == "/history.json":
+                payload = history_payload(cache.source, query)
+                if payload is None:
+                    self.send_error(404, "Historique disponible seulement avec --daemon")
+                    return
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                content_type = "application/json; charset=utf-8"
+            elif path == "/metrics":
+                body = format_prometheus(cache.get()).encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/snapshot.json":
+                body = json.dumps(cache.get(), ensure_ascii=False).encode("utf-8")
+                content_type = "application/json; charset=utf-8"
+            elif path in ("/", "/report.html"):
+                body = render_html_report(cache.get(), ALL_SECTIONS).encode("utf-8")
+                content_type = "text/html; charset=utf-8"
+            else:
+                self.send_error(404, "Route inconnue")
+                return
+        except Exception as e:
+            self.send_error(500, f"Erreur de collecte: {e}")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête : un scrapeur toutes les secondes noierait la sortie
+        pass
+
+
+def create_server(host=SERVER_HOST, port=SERVER_PORT, max_age=CACHE_MAX_AGE, source=None, collector=None):
+    """Crée le serveur (non démarré) ; `port=0` choisit un port libre."""
+    server = ThreadingHTTPServer((host, port), StatRequestHandler)
+    server.daemon_threads = True
+    server.cache = SnapshotCache(max_age, collector, source)
+    return server
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, max_age=CACHE_MAX_AGE, source=None, collector=None):
+    server = create_server(host, port, max_age, source, collector)
+    bound_host, bound_port = server.server_address[:2]
+    print(f"Serveur de métriques à l'écoute sur http://{bound_host}:{bound_port}/ (/metrics, /snapshot.json, /history.json)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Arrêt du serveur.")
+    finally:
+        server.server_close()
@@ -6,15 +6,21 @@ import glob
 import sys
 import pprint  # Utilisé uniquement pour l'affichage de fin
 
+from stat_reporter import REGISTRY, SysfsReader, HardwareInventory, read_net_dev, shared_gpu_probe
+
 
 # --- 1. FONCTION UTILITAIRE (Gestion des erreurs de lecture) ---
+# Le lecteur garde les fichiers ouverts entre deux collectes (relecture par pread)
+_lecteur = SysfsReader()
+_sonde_gpu = shared_gpu_probe()
+_inventaire = HardwareInventory()
+
+
 def lire_fichier(chemin):
     """Lit un fichier proprement sans faire crasher le programme."""
     try:
-        # Utilisation de 'with open' pour s'assurer que le fichier est fermé
-        with open(chemin, 'r') as f:
-            return f.read().strip()
-    except (FileNotFoundError, PermissionError, OSError):
+        return _lecteur.read_raw(chemin).strip()
+    except OSError:
         # Retourne None en cas d'échec (lecture illisible, fichier manquant, etc.)
         return None
 
@@ -51,17 +57,13 @@ def get_cpu_gpu_temp():
         if val and val.isdigit():
             temps[nom] = f"{int(val) / 1000:.1f}°C"
 
-    # GPU NVIDIA (Via subprocess, sécurisé)
-    try:
-        res = subprocess.run(["nvidia-smi", "--query-gpu=temperature.gpu",
-                              "--format=csv,noheader,nounits"],
-                             capture_output=True, text=True, check=True)
-        temps["GPU_NVIDIA"] = f"{res.stdout.strip()}°C"
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    # GPU NVIDIA (nvidia-smi persistant, absence mémorisée)
+    gpu_temps = _sonde_gpu.temperatures()
+    if gpu_temps:
+        temps["GPU_NVIDIA"] = ", ".join(f"{t}°C" for t in gpu_temps.values())
+    else:
         # Ajout d'une entrée claire si le GPU est manquant ou si la commande échoue
         temps["GPU_NVIDIA"] = "Non détecté ou commande nvidia-smi manquante"
-    except Exception as e:
-        temps["GPU_NVIDIA"] = f"Erreur de lecture: {e}"
 
     return temps
 
@@ -129,28 +131,15 @@ def get_memoire():
 
 
 def get_stockage():
-    """Scanne tous les disques physiques, remplace 'nvme0n1'."""
+    """Liste les disques physiques (modèle, taille, type) depuis l'inventaire matériel."""
     disques = {}
-    patterns = ["/sys/block/sd*", "/sys/block/nvme*", "/sys/block/mmcblk*"]
-    chemins = []
-    for p in patterns: chemins.extend(glob.glob(p))
-
-    for path in chemins:
-        nom_disque = path.split('/')[-1]
-
-        # Ignorer les partitions (sda1, sda2)
-        if len(nom_disque) > 3 and nom_disque[-1].isdigit(): continue
-
-        modele = lire_fichier(f"{path}/device/model") or "Inconnu"
-        taille_sec = lire_fichier(f"{path}/size")
-        taille_go = 0
-        if taille_sec and taille_sec.isdigit():
-            taille_go = round((int(taille_sec) * 512) / (1000 ** 3), 1)
 
-        rot = lire_fichier(f"{path}/queue/rotational")
-        type_d = "HDD" if rot == "1" else "SSD/NVMe"
+    # Modèle, taille et type ne changent pas : l'inventaire ne les relit qu'en cas de changement
+    for nom_disque, infos in _inventaire.refresh().disks.items():
+        taille_go = round(infos["size_bytes"] / (1000 ** 3), 1)
+        type_d = "HDD" if infos["rotational"] else "SSD/NVMe"
 
-        disques[nom_disque] = f"{modele} ({taille_go} Go) - {type_d}"
+        disques[nom_disque] = f"{infos['model']} ({taille_go} Go) - {type_d}"
 
     if not disques:
         return {"erreur": "Aucun périphérique de stockage détecté."}
@@ -161,19 +150,17 @@ def get_reseau():
     """Récupère les statistiques RX/TX pour toutes les interfaces et le SSID WiFi."""
     net_info = {}
 
-    # 1. Statistiques de base (RX/TX)
-    for path in glob.glob("/sys/class/net/*"):
-        iface = path.split('/')[-1]
-        if iface == "lo": continue
+    # 1. Statistiques de base (RX/TX), lues en une fois dans /proc/net/dev
+    try:
+        compteurs = read_net_dev(reader=_lecteur)
+    except OSError:
+        compteurs = {}
 
-        rx = lire_fichier(f"{path}/statistics/rx_bytes")
-        tx = lire_fichier(f"{path}/statistics/tx_bytes")
+    for iface, (rx, _, tx, _) in compteurs.items():
+        if iface == "lo": continue
 
         # Conversion propre en MiB (Mégaoctets binaires)
-        rx_mib = round(int(rx) / (1024 ** 2), 1) if rx and rx.isdigit() else 0
-        tx_mib = round(int(tx) / (1024 ** 2), 1) if tx and tx.isdigit() else 0
-
-        net_info[iface] = {"DL_MiB": rx_mib, "UL_MiB": tx_mib}
+        net_info[iface] = {"DL_MiB": round(rx / (1024 ** 2), 1), "UL_MiB": round(tx / (1024 ** 2), 1)}
 
     # 2. Info Wifi spécifique (SSID)
     try:
@@ -189,21 +176,21 @@ def get_reseau():
 
 
 # --- 3. FONCTION D'ORCHESTRATION ---
-def collecter_toutes_les_metriques():
-    """Appelle toutes les fonctions pour centraliser la collecte."""
-
-    # Les processus sont le point le plus lent, donc on les met à part pour l'instant
-    # (Ils devront être refactorisés pour le calcul CPU)
-    # process_list = get_process_list()
-
-    return {
-        "General": get_infos_generales(),
-        "Temperatures": get_cpu_gpu_temp(),
-        "Memoire": get_memoire(),
-        "Alimentation": get_alimentation(),
-        "Disques": get_stockage(),
-        "Reseau": get_reseau()
-        # "Processus": process_list
-    }
+# Collecteurs rangés dans le registre de stat_reporter, sous ses noms de sections ;
+# COLLECTEURS limite la collecte à ceux de ce script.
+# Les processus restent hors registre pour l'instant (ils devront être refactorisés pour le calcul CPU)
+COLLECTEURS = ("General", "Temperatures", "Memoire", "Alimentation", "Disques", "Reseau")
+REGISTRY.register('general', "General", get_infos_generales, cost=1)
+REGISTRY.register('hardware', "Temperatures", get_cpu_gpu_temp, cost=2)
+REGISTRY.register('memory', "Memoire", get_memoire, cost=1)
+REGISTRY.register('hardware', "Alimentation", get_alimentation, cost=1)
+REGISTRY.register('disk', "Disques", get_stockage, cost=1)
+REGISTRY.register('network', "Reseau", get_reseau, cost=3)
+
+
+def collecter_toutes_les_metriques(sections=None):
+    """Collecte en parallèle les sections demandées (toutes par défaut), avec les collecteurs de ce script."""
+    donnees, _ = REGISTRY.collect(sections, names=COLLECTEURS)
+    return donnees
 
 print(get_reseau())
\ No newline at end of file